@@ -0,0 +1,3 @@
+"""
+Общий код лабораторных lab02 и lab04: метрики генерации и снимки весов моделей.
+"""
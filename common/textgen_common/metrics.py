@@ -0,0 +1,466 @@
+"""
+Модуль для сбора метрик генерации текста.
+
+Содержит гистограммы задержек и объемов генерации, таймер одного вызова
+генерации и экспортеры метрик в формате Prometheus и в CSV файл.
+"""
+import csv
+import os
+import resource
+import threading
+import time
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import torch
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - без psutil RSS читается из /proc
+    psutil = None
+
+_process = psutil.Process() if psutil is not None else None
+
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+MEMORY_BUCKETS = tuple(2 ** power * 1024 * 1024 for power in range(6, 15))
+
+# Имя метрики -> (описание, границы корзин)
+HISTOGRAMS = {
+    "tokenize_seconds": ("Время токенизации входного текста", LATENCY_BUCKETS),
+    "time_to_first_token_seconds": ("Время от начала вызова до первого токена", LATENCY_BUCKETS),
+    "generation_seconds": ("Полное время генерации", LATENCY_BUCKETS),
+    "tokens_per_second": ("Скорость генерации новых токенов", RATE_BUCKETS),
+    "input_tokens": ("Количество входных токенов", TOKEN_BUCKETS),
+    "output_tokens": ("Количество сгенерированных токенов", TOKEN_BUCKETS),
+    "peak_memory_bytes": ("Пиковая память процесса или GPU за время вызова", MEMORY_BUCKETS),
+}
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными границами корзин.
+    """
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        """
+        Создает пустую гистограмму.
+
+        Args:
+            buckets (tuple[float, ...]): Верхние границы корзин по возрастанию.
+        """
+
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Добавляет наблюдение.
+
+        Args:
+            value (float): Наблюдаемое значение.
+        """
+
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Exporter:
+    """
+    Базовый класс экспортера: получает каждое измерение и может отдавать агрегаты.
+    """
+
+    def export(self, model_name: str, sample: dict[str, float]) -> None:
+        """
+        Обрабатывает измерение одного вызова генерации.
+
+        Args:
+            model_name (str): Имя модели.
+            sample (dict[str, float]): Значения метрик вызова.
+        """
+
+    def close(self) -> None:
+        """
+        Освобождает ресурсы экспортера.
+        """
+
+
+class MetricsRegistry:
+    """
+    Потокобезопасное хранилище гистограмм метрик генерации по моделям.
+    """
+
+    def __init__(self) -> None:
+        """
+        Создает пустое хранилище без экспортеров.
+        """
+
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+        self.exporters: list[Exporter] = []
+
+    def add_exporter(self, exporter: Exporter) -> None:
+        """
+        Подключает экспортер.
+
+        Args:
+            exporter (Exporter): Экспортер метрик.
+        """
+
+        self.exporters.append(exporter)
+
+    def record(self, model_name: str, sample: dict[str, float]) -> None:
+        """
+        Добавляет измерение одного вызова во все гистограммы и передает его экспортерам.
+
+        Args:
+            model_name (str): Имя модели.
+            sample (dict[str, float]): Значения метрик вызова.
+        """
+
+        with self._lock:
+            for name, value in sample.items():
+                if name not in HISTOGRAMS or value is None:
+                    continue
+                histogram = self._histograms.get((name, model_name))
+                if histogram is None:
+                    histogram = self._histograms[(name, model_name)] = Histogram(HISTOGRAMS[name][1])
+                histogram.observe(value)
+        for exporter in self.exporters:
+            exporter.export(model_name, sample)
+
+    def measure(self, model_name: str) -> "GenerationTimer":
+        """
+        Создает таймер для одного вызова генерации.
+
+        Args:
+            model_name (str): Имя модели.
+
+        Returns:
+            GenerationTimer: Таймер вызова.
+        """
+
+        return GenerationTimer(self, model_name)
+
+    def prometheus_text(self) -> str:
+        """
+        Формирует текущие гистограммы в текстовом формате Prometheus.
+
+        Returns:
+            str: Содержимое страницы /metrics.
+        """
+
+        lines = []
+        with self._lock:
+            for name, (description, _) in HISTOGRAMS.items():
+                metric = f"generation_{name}"
+                lines.append(f"# HELP {metric} {description}")
+                lines.append(f"# TYPE {metric} histogram")
+                for (histogram_name, model_name), histogram in self._histograms.items():
+                    if histogram_name != name:
+                        continue
+                    label = model_name.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{metric}_bucket{{model="{label}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_bucket{{model="{label}",le="+Inf"}} {histogram.count}')
+                    lines.append(f'{metric}_sum{{model="{label}"}} {histogram.sum}')
+                    lines.append(f'{metric}_count{{model="{label}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+def current_memory() -> int:
+    """
+    Возвращает текущую память: выделенную torch на GPU или RSS процесса.
+
+    Returns:
+        int: Объем памяти в байтах, 0 - если его не удалось определить.
+    """
+
+    if torch.cuda.is_available():
+        return torch.cuda.memory_allocated()
+    if _process is not None:
+        return _process.memory_info().rss
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def lifetime_peak_memory() -> int:
+    """
+    Возвращает пик памяти за все время работы процесса (GPU или RSS).
+
+    Returns:
+        int: Объем памяти в байтах.
+    """
+
+    if torch.cuda.is_available():
+        return torch.cuda.max_memory_allocated()
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemorySampler:
+    """
+    Фоновый поток, который, пока идут вызовы генерации, периодически замеряет память
+    и обновляет пик каждого активного таймера. Глобальные счетчики пиков не сбрасываются,
+    поэтому одновременные вызовы не мешают друг другу.
+    """
+
+    def __init__(self, interval: float = 0.01) -> None:
+        """
+        Создает сэмплер; поток запускается при первом таймере.
+
+        Args:
+            interval (float): Период замеров в секундах.
+        """
+
+        self.interval = interval
+        self._timers: weakref.WeakSet = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._has_timers = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, timer: "GenerationTimer") -> None:
+        """
+        Начинает отслеживать пик памяти таймера.
+
+        Args:
+            timer (GenerationTimer): Таймер вызова.
+        """
+
+        timer.peak_memory = current_memory()
+        with self._lock:
+            self._timers.add(timer)
+            self._has_timers.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="memory-sampler", daemon=True)
+                self._thread.start()
+
+    def stop(self, timer: "GenerationTimer") -> None:
+        """
+        Прекращает отслеживать таймер, учитывая последний замер.
+
+        Args:
+            timer (GenerationTimer): Таймер вызова.
+        """
+
+        timer.peak_memory = max(timer.peak_memory, current_memory())
+        with self._lock:
+            self._timers.discard(timer)
+            if not self._timers:
+                self._has_timers.clear()
+
+    def _run(self) -> None:
+        """
+        Цикл замеров; простаивает, пока нет активных таймеров.
+        """
+
+        while True:
+            self._has_timers.wait()
+            value = current_memory()
+            with self._lock:
+                for timer in self._timers:
+                    timer.peak_memory = max(timer.peak_memory, value)
+                if not self._timers:
+                    self._has_timers.clear()
+            time.sleep(self.interval)
+
+
+class GenerationTimer:
+    """
+    Таймер одного вызова генерации.
+
+    Экземпляр можно передать в generate как логит-процессор
+    (logits_processor=LogitsProcessorList([timer])): его первый вызов происходит
+    сразу после обработки промта, что и считается временем до первого токена.
+    """
+
+    def __init__(self, registry: MetricsRegistry, model_name: str) -> None:
+        """
+        Запускает таймер.
+
+        Args:
+            registry (MetricsRegistry): Хранилище, куда будет записано измерение.
+            model_name (str): Имя модели.
+        """
+
+        self.registry = registry
+        self.model_name = model_name
+        self.start = time.perf_counter()
+        self.tokenize_seconds = None
+        self.first_token_seconds = None
+        self.input_tokens = 0
+        self.peak_memory = 0
+        self.lifetime_peak_start = lifetime_peak_memory()
+        memory_sampler.start(self)
+
+    def tokenized(self, input_tokens: int) -> None:
+        """
+        Отмечает окончание токенизации.
+
+        Args:
+            input_tokens (int): Количество входных токенов.
+        """
+
+        self.tokenize_seconds = time.perf_counter() - self.start
+        self.input_tokens = input_tokens
+
+    def first_token(self) -> None:
+        """
+        Отмечает появление первого токена; повторные вызовы игнорируются.
+        """
+
+        if self.first_token_seconds is None:
+            self.first_token_seconds = time.perf_counter() - self.start
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        """
+        Интерфейс логит-процессора: отмечает первый токен и не меняет логиты.
+        """
+
+        self.first_token()
+        return scores
+
+    def finish(self, output_tokens: int) -> dict[str, float]:
+        """
+        Останавливает таймер и записывает измерение.
+
+        Args:
+            output_tokens (int): Количество сгенерированных токенов.
+
+        Returns:
+            dict[str, float]: Значения метрик вызова.
+        """
+
+        total = time.perf_counter() - self.start
+        self.first_token()
+        decode_seconds = total - (self.tokenize_seconds or 0.0)
+        memory_sampler.stop(self)
+        peak_memory = self.peak_memory
+        lifetime_peak = lifetime_peak_memory()
+        if lifetime_peak > self.lifetime_peak_start:
+            # Новый пик процесса достигнут во время этого вызова; сэмплер мог пропустить короткий всплеск
+            peak_memory = max(peak_memory, lifetime_peak)
+        sample = {
+            "timestamp": time.time(),
+            "tokenize_seconds": self.tokenize_seconds,
+            "time_to_first_token_seconds": self.first_token_seconds,
+            "generation_seconds": total,
+            "tokens_per_second": output_tokens / decode_seconds if decode_seconds > 0 else 0.0,
+            "input_tokens": self.input_tokens,
+            "output_tokens": output_tokens,
+            "peak_memory_bytes": peak_memory,
+        }
+        self.registry.record(self.model_name, sample)
+        return sample
+
+
+class CsvExporter(Exporter):
+    """
+    Экспортер, дописывающий каждое измерение строкой в CSV файл.
+    """
+
+    FIELDS = ["timestamp", "model", *HISTOGRAMS]
+
+    def __init__(self, filename: str = "generation_metrics.csv") -> None:
+        """
+        Открывает CSV файл на дозапись.
+
+        Args:
+            filename (str): Имя CSV файла.
+        """
+
+        new_file = not os.path.exists(filename) or os.path.getsize(filename) == 0
+        self._lock = threading.Lock()
+        self._file = open(filename, "a", encoding="utf-8", newline="")  # pylint: disable=consider-using-with
+        self._writer = csv.DictWriter(self._file, fieldnames=self.FIELDS, extrasaction="ignore")
+        if new_file:
+            self._writer.writeheader()
+
+    def export(self, model_name: str, sample: dict[str, float]) -> None:
+        with self._lock:
+            self._writer.writerow({**sample, "model": model_name})
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class PrometheusExporter(Exporter):
+    """
+    Экспортер, отдающий гистограммы по HTTP в текстовом формате Prometheus.
+    """
+
+    def __init__(self, registry: MetricsRegistry, port: int = 9100, host: str = "127.0.0.1") -> None:
+        """
+        Запускает HTTP сервер в фоновом потоке.
+
+        Args:
+            registry (MetricsRegistry): Хранилище, гистограммы которого отдаются.
+            port (int): Порт сервера.
+            host (str): Адрес, на котором слушает сервер.
+        """
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            """Отдает /metrics."""
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                """Обрабатывает GET запрос."""
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+                """Отключает логирование запросов."""
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# Общее хранилище метрик процесса
+metrics = MetricsRegistry()
+memory_sampler = MemorySampler()
+_configured: set[tuple[str, str, int]] = set()
+
+
+def configure_exporter(exporter: str, csv_path: str = "generation_metrics.csv", port: int = 9100) -> None:
+    """
+    Подключает экспортер к общему хранилищу по имени.
+    Повторный вызов с теми же параметрами ничего не делает.
+
+    Args:
+        exporter (str): "csv", "prometheus" или "none".
+        csv_path (str): Имя CSV файла для экспортера "csv".
+        port (int): Порт HTTP сервера для экспортера "prometheus".
+    """
+
+    if (exporter, csv_path, port) in _configured:
+        return
+    _configured.add((exporter, csv_path, port))
+
+    if exporter == "csv":
+        metrics.add_exporter(CsvExporter(csv_path))
+    elif exporter == "prometheus":
+        metrics.add_exporter(PrometheusExporter(metrics, port))
+    elif exporter not in ("none", "", None):
+        raise ValueError(f"Неизвестный экспортер метрик: {exporter}")
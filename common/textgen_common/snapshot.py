@@ -0,0 +1,156 @@
+"""
+Модуль для быстрого запуска модели из локального снимка весов.
+
+Снимок - это каталог с конфигурацией, токенизатором и весами в одном файле
+safetensors. При загрузке файл весов отображается в память (mmap), и параметры
+модели ссылаются прямо на страницы файла: веса не десериализуются и не копируются,
+а несколько процессов, загрузивших один снимок, разделяют одни и те же страницы
+в page cache.
+
+Каталог снимков и запасная загрузка через from_pretrained задаются в лабораторных
+(lab02/Model/snapshot.py, lab04/Models/snapshot.py).
+"""
+import json
+import os
+
+import torch
+from transformers import AutoConfig, AutoModelForCausalLM, AutoTokenizer, PreTrainedModel, PreTrainedTokenizerBase
+
+try:
+    from accelerate import init_empty_weights
+except ImportError:  # pragma: no cover - без accelerate снимки можно только создавать
+    init_empty_weights = None
+
+WEIGHTS_NAME = "model.safetensors"
+
+DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def snapshot_path(model_name: str, snapshot_root: str) -> str:
+    """
+    Возвращает каталог снимка для модели.
+
+    Args:
+        model_name (str): Имя модели в Hugging Face Hub.
+        snapshot_root (str): Корневой каталог снимков.
+
+    Returns:
+        str: Путь к каталогу снимка.
+    """
+    return os.path.join(snapshot_root, model_name.replace("/", "--"))
+
+
+def create_snapshot(model_path: str, tokenizer_path: str, output_dir: str) -> str:
+    """
+    Сохраняет модель и токенизатор в локальный снимок с весами в одном файле safetensors.
+
+    Args:
+        model_path (str): Путь или имя модели.
+        tokenizer_path (str): Путь или имя токенизатора.
+        output_dir (str): Каталог снимка.
+
+    Returns:
+        str: Путь к каталогу снимка.
+    """
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_path)
+    model = AutoModelForCausalLM.from_pretrained(model_path)
+    os.makedirs(output_dir, exist_ok=True)
+    # Один файл без шардирования, чтобы его можно было отобразить в память целиком
+    model.save_pretrained(output_dir, safe_serialization=True, max_shard_size="1000GB")
+    tokenizer.save_pretrained(output_dir)
+    return output_dir
+
+
+def mmap_safetensors(path: str) -> dict[str, torch.Tensor]:
+    """
+    Отображает файл safetensors в память и возвращает тензоры, ссылающиеся на него.
+
+    Файл отображается с MAP_PRIVATE: изменения тензоров не попадают в файл,
+    а неизмененные страницы разделяются всеми процессами.
+
+    Args:
+        path (str): Путь к файлу safetensors.
+
+    Returns:
+        dict[str, torch.Tensor]: Тензоры по именам.
+    """
+    with open(path, "rb") as file:
+        header_size = int.from_bytes(file.read(8), "little")
+        header = json.loads(file.read(header_size))
+    header.pop("__metadata__", None)
+
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+    data_start = 8 + header_size
+    tensors = {}
+    for name, info in header.items():
+        dtype = DTYPES[info["dtype"]]
+        start, end = info["data_offsets"]
+        flat = torch.empty(0, dtype=dtype)
+        element_size = flat.element_size()
+        flat.set_(storage, (data_start + start) // element_size, ((end - start) // element_size,))
+        tensors[name] = flat.view(info["shape"])
+    return tensors
+
+
+def load_snapshot(snapshot_dir: str) -> PreTrainedModel:
+    """
+    Загружает модель из снимка без копирования весов.
+
+    Модель создается без выделения памяти под параметры, после чего параметры
+    подменяются тензорами, отображенными из файла.
+
+    Args:
+        snapshot_dir (str): Каталог снимка.
+
+    Returns:
+        PreTrainedModel: Модель в режиме eval.
+
+    Raises:
+        ImportError: Если не установлен accelerate.
+        ValueError: Если в снимке нет весов части параметров.
+    """
+    if init_empty_weights is None:
+        raise ImportError("Для загрузки снимков нужен accelerate: pip install textgen-common[snapshot]")
+    config = AutoConfig.from_pretrained(snapshot_dir)
+    with init_empty_weights(include_buffers=False):
+        model = AutoModelForCausalLM.from_config(config)
+
+    state_dict = mmap_safetensors(os.path.join(snapshot_dir, WEIGHTS_NAME))
+    model.load_state_dict(state_dict, strict=False, assign=True)
+    model.tie_weights()
+
+    missing = [name for name, parameter in model.named_parameters() if parameter.is_meta]
+    if missing:
+        raise ValueError(f"В снимке {snapshot_dir} нет весов: {', '.join(missing)}")
+    model.eval()
+    return model
+
+
+def find_snapshot(model_name: str, snapshot_root: str,
+                  tokenizer_class: type = AutoTokenizer) -> tuple[PreTrainedModel, PreTrainedTokenizerBase] | None:
+    """
+    Загружает модель и токенизатор из локального снимка, если он создан.
+
+    Args:
+        model_name (str): Путь или имя модели.
+        snapshot_root (str): Корневой каталог снимков.
+        tokenizer_class (type): Класс токенизатора.
+
+    Returns:
+        tuple[PreTrainedModel, PreTrainedTokenizerBase] | None: Модель и токенизатор или None, если снимка нет.
+    """
+    snapshot_dir = snapshot_path(model_name, snapshot_root)
+    if not os.path.exists(os.path.join(snapshot_dir, WEIGHTS_NAME)):
+        return None
+    return load_snapshot(snapshot_dir), tokenizer_class.from_pretrained(snapshot_dir)
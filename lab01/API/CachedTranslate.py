@@ -0,0 +1,177 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from API.Model.BaseTranslate import BaseTranslate
+
+
+class CachedTranslate(BaseTranslate):
+    # Обёртка над любым сервисом перевода: LRU в памяти перед SQLite-хранилищем на диске.
+    # Ключ кэша - (сервис, исходный язык, язык перевода, текст)
+
+    def __init__(self, translator: BaseTranslate, db_path: str = "translations.sqlite3",
+                 memory_size: int = 1024, max_entries: int = 100_000, ttl: float = 30 * 24 * 3600,
+                 language_ttl: float = 24 * 3600):
+        super().__init__(translator.token)
+        self.translator = translator
+        self.provider = type(translator).__name__
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.language_ttl = language_ttl
+        self.languages: tuple[list[str], float] | None = None
+
+        self.memory: OrderedDict[tuple, tuple[str, float]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+
+        self.connection = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        with self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS translations (
+                    provider TEXT NOT NULL,
+                    input_lang TEXT NOT NULL,
+                    output_lang TEXT NOT NULL,
+                    input_text TEXT NOT NULL,
+                    output_text TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (provider, input_lang, output_lang, input_text)
+                )""")
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS translations_accessed ON translations (accessed_at)")
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS languages (
+                    provider TEXT PRIMARY KEY,
+                    languages TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )""")
+
+    def translate(self, input_text, input_lang, output_lang) -> str:
+        key = (self.provider, input_lang, output_lang, input_text)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        output_text = self.translator.translate(input_text, input_lang, output_lang)
+        # Пустая строка означает ошибку сервиса - такой ответ не кэшируем
+        if output_text:
+            self.put(key, output_text)
+        return output_text
+
+    def translate_batch(self, texts: list[str], input_lang, output_lang) -> list[str]:
+        # В сервис уходят только тексты, которых нет в кэше, причём без повторов
+        results = {}
+        missing = []
+        for text in texts:
+            if text in results or text in missing:
+                continue
+            cached = self.get((self.provider, input_lang, output_lang, text))
+            if cached is None:
+                missing.append(text)
+            else:
+                results[text] = cached
+
+        if missing:
+            for text, output_text in zip(missing, self.translator.translate_batch(missing, input_lang, output_lang)):
+                if output_text:
+                    self.put((self.provider, input_lang, output_lang, text), output_text)
+                results[text] = output_text
+        return [results[text] for text in texts]
+
+    def language(self) -> list[str]:
+        # Список языков меняется редко: держим его в памяти и на диске
+        # и обновляем не чаще, чем раз в language_ttl секунд
+        now = time.time()
+        with self.lock:
+            if self.languages is None:
+                row = self.connection.execute(
+                    "SELECT languages, fetched_at FROM languages WHERE provider = ?",
+                    (self.provider,)).fetchone()
+                if row is not None:
+                    self.languages = (json.loads(row[0]), row[1])
+            if self.languages is not None and now - self.languages[1] < self.language_ttl:
+                return self.languages[0]
+
+        languages = self.translator.language()
+        if not languages:
+            # Сервис недоступен - лучше показать устаревший список, чем пустой
+            return self.languages[0] if self.languages is not None else languages
+
+        with self.lock:
+            self.languages = (languages, now)
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO languages VALUES (?, ?, ?)",
+                    (self.provider, json.dumps(languages), now))
+        return languages
+
+    def get(self, key: tuple) -> str | None:
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+            self.memory.pop(key, None)
+
+            row = self.connection.execute(
+                "SELECT output_text, created_at FROM translations "
+                "WHERE provider = ? AND input_lang = ? AND output_lang = ? AND input_text = ?",
+                key).fetchone()
+            if row is None or now - row[1] >= self.ttl:
+                self.misses += 1
+                return None
+
+            with self.connection:
+                self.connection.execute(
+                    "UPDATE translations SET accessed_at = ? "
+                    "WHERE provider = ? AND input_lang = ? AND output_lang = ? AND input_text = ?",
+                    (now, *key))
+            self._remember(key, row[0], row[1])
+            self.disk_hits += 1
+            return row[0]
+
+    def put(self, key: tuple, output_text: str):
+        now = time.time()
+        with self.lock:
+            self._remember(key, output_text, now)
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (*key, output_text, now, now))
+                self.writes += 1
+                # Подсчёт строк в SQLite требует полного прохода, поэтому чистим не на каждой записи
+                if self.writes % 100 == 1:
+                    self._evict(now)
+
+    def _remember(self, key: tuple, output_text: str, created_at: float):
+        self.memory[key] = (output_text, created_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def _evict(self, now: float):
+        self.connection.execute("DELETE FROM translations WHERE created_at <= ?", (now - self.ttl,))
+        count = self.connection.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        if count > self.max_entries:
+            # Удаляем записи, к которым дольше всего не обращались
+            self.connection.execute(
+                "DELETE FROM translations WHERE rowid IN "
+                "(SELECT rowid FROM translations ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,))
+
+    def stats(self) -> dict[str, int]:
+        with self.lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
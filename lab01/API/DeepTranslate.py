@@ -1,11 +1,7 @@
 from API.Model.BaseTranslate import BaseTranslate
-import requests
 
 class DeepTranslate(BaseTranslate):
 
-    def __init__(self, token):
-        self.token = token
-
     def translate(self, input_text, input_lang, output_lang) -> str:
         url = "https://deep-translate1.p.rapidapi.com/language/translate/v2"
 
@@ -21,7 +17,7 @@ class DeepTranslate(BaseTranslate):
             "Content-Type": "application/json"
         }
 
-        response = requests.post(url, json=payload_deep, headers=headers_deep)
+        response = self.request("POST", url, json=payload_deep, headers=headers_deep)
         result_json = response.json()
         if response.status_code == 200:
             output_text = result_json['data']['translations']['translatedText']
@@ -36,7 +32,7 @@ class DeepTranslate(BaseTranslate):
         "x-rapidapi-host": "deep-translate1.p.rapidapi.com"
         }
 
-        response = requests.get(url, headers=headers)
+        response = self.request("GET", url, headers=headers)
         result_json = response.json()
         ans = list()
         if response.status_code == 200:
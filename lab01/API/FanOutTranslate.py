@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from API.Model.BaseTranslate import BaseTranslate, common_languages
+
+
+class FanOutTranslate(BaseTranslate):
+    # Отправляет текст во все сервисы одновременно. translate_all возвращает переводы по именам
+    # сервисов, а translate - первый непустой из них в порядке translators, как обычный сервис.
+    # Дедлайн только перестаёт ждать ответ: уже начатый вызов сервиса завершится сам по своим
+    # HTTP-таймаутам (BaseTranslate.request), поэтому пул рассчитан на max_in_flight текстов
+    # на каждый сервис, чтобы такие вызовы не задерживали следующие тексты
+
+    def __init__(self, translators: dict[str, BaseTranslate], deadline: float = 10.0,
+                 deadlines: dict[str, float] | None = None, max_in_flight: int = 4):
+        super().__init__(token=None)
+        # deadlines позволяет задать собственный дедлайн на один текст для отдельного сервиса
+        self.translators = translators
+        self.deadline = deadline
+        self.deadlines = deadlines or {}
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight * len(translators),
+                                           thread_name_prefix="fan-out")
+
+    def translate(self, input_text, input_lang, output_lang) -> str:
+        return next((text for text in self.translate_all(input_text, input_lang, output_lang).values() if text), "")
+
+    def translate_batch(self, texts: list[str], input_lang, output_lang) -> list[str]:
+        return [
+            next((text for text in translation.values() if text), "")
+            for translation in self.translate_all_batch(texts, input_lang, output_lang)
+        ]
+
+    def translate_all(self, input_text, input_lang, output_lang) -> dict[str, str]:
+        return self._fan_out("translate", "", 1, input_text, input_lang, output_lang)
+
+    def translate_all_batch(self, texts: list[str], input_lang, output_lang) -> list[dict[str, str]]:
+        # Каждый сервис получает весь пакет сразу, результат перекладывается по текстам.
+        # Дедлайны всех сервисов растут пропорционально размеру пакета
+        translations = self._fan_out("translate_batch", [""] * len(texts), len(texts), texts, input_lang, output_lang)
+        return [
+            {name: translated[i] for name, translated in translations.items()}
+            for i in range(len(texts))
+        ]
+
+    def _fan_out(self, method: str, default, scale: int, *args) -> dict:
+        start = time.monotonic()
+        futures = {
+            name: self.executor.submit(getattr(translator, method), *args)
+            for name, translator in self.translators.items()
+        }
+
+        translation = {}
+        for name, future in futures.items():
+            deadline = start + self.deadlines.get(name, self.deadline) * scale
+            try:
+                translation[name] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except Exception:
+                # Сервис не уложился в дедлайн или упал - оставляем пустой перевод
+                future.cancel()
+                translation[name] = default
+        return translation
+
+    def language(self) -> list[str]:
+        return common_languages(self.translators.values())
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,12 +1,8 @@
 from API.Model.BaseTranslate import BaseTranslate
-import requests
 
 
 class GoogleTranslate(BaseTranslate):
     
-    def __init__(self, token):
-        self.token = token
-
     def translate(self, input_text, input_lang, output_lang) -> str:
         url = "https://google-translate113.p.rapidapi.com/api/v1/translator/text"
         payload_google = {
@@ -21,7 +17,7 @@ class GoogleTranslate(BaseTranslate):
             "Content-Type": "application/json"
         }
 
-        response = requests.post(url, json=payload_google, headers=headers_google)
+        response = self.request("POST", url, json=payload_google, headers=headers_google)
         if response.status_code == 200:
             result_json = response.json()
             output = result_json['trans']
@@ -36,7 +32,7 @@ class GoogleTranslate(BaseTranslate):
             "x-rapidapi-host": "google-translate113.p.rapidapi.com"
         }
 
-        response = requests.get(url, headers=headers)
+        response = self.request("GET", url, headers=headers)
         ans = list()
         if response.status_code == 200:
             result_json = response.json()
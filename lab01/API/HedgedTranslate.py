@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from API.Model.BaseTranslate import BaseTranslate, common_languages
+
+
+class HedgedTranslate(BaseTranslate):
+    # Отправляет запрос самому быстрому по статистике сервису и, если тот не ответил
+    # за hedge_percentile своих задержек, дублирует запрос следующему. Возвращается первый
+    # непустой перевод, остальные запросы отменяются или игнорируются.
+    # В режиме race запрос сразу уходит во все сервисы.
+    # Оборачивать нужно сами сервисы, а не CachedTranslate: попадание в кэш дало бы почти нулевую
+    # задержку, и выбор сервиса следовал бы за кэшем, а не за сетью. Кэш ставится поверх хеджирования.
+
+    def __init__(self, translators: dict[str, BaseTranslate], hedge_percentile: float = 0.95,
+                 default_hedge_delay: float = 1.0, window: int = 100, race: bool = False):
+        super().__init__(token=None)
+        self.translators = translators
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.race = race
+        self.latencies = {name: deque(maxlen=window) for name in translators}
+        self.outcomes = {name: deque(maxlen=window) for name in translators}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=2 * len(translators), thread_name_prefix="hedged")
+
+    def translate(self, input_text, input_lang, output_lang) -> str:
+        order = self.ranking()
+        pending: dict[Future, str] = {}
+
+        def launch():
+            name = order.pop(0)
+            future = self.executor.submit(self.timed, name, input_text, input_lang, output_lang)
+            pending[future] = name
+
+        launch()
+        while self.race and order:
+            launch()
+
+        try:
+            while pending:
+                primary = next(iter(pending.values()))
+                done, _ = wait(pending, timeout=self.hedge_delay(primary) if order else None,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.pop(future)
+                    if future.exception() is None and future.result():
+                        return future.result()
+                # Таймаут хеджирования или ошибка сервиса - подключаем следующий
+                if order and (not done or not pending):
+                    launch()
+            return ""
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def timed(self, name: str, input_text, input_lang, output_lang) -> str:
+        start = time.monotonic()
+        try:
+            result = self.translators[name].translate(input_text, input_lang, output_lang)
+        except Exception:
+            result = ""
+        latency = time.monotonic() - start
+        with self.lock:
+            self.outcomes[name].append(bool(result))
+            if result:
+                self.latencies[name].append(latency)
+        return result
+
+    def ranking(self) -> list[str]:
+        # Сначала сервисы с наименьшей долей недавних ошибок, среди них - с наименьшей медианой.
+        # Сервисы без статистики идут первыми, чтобы по ним набрались замеры
+        def key(name: str) -> tuple[float, float]:
+            outcomes = self.outcomes[name]
+            failure_rate = outcomes.count(False) / len(outcomes) if outcomes else 0.0
+            samples = sorted(self.latencies[name])
+            median = samples[len(samples) // 2] if samples else 0.0
+            return failure_rate, median
+
+        with self.lock:
+            return sorted(self.translators, key=key)
+
+    def hedge_delay(self, name: str) -> float:
+        with self.lock:
+            samples = sorted(self.latencies[name])
+        if len(samples) < 5:
+            return self.default_hedge_delay
+        return samples[min(len(samples) - 1, int(len(samples) * self.hedge_percentile))]
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        with self.lock:
+            return {
+                name: {
+                    "samples": len(samples),
+                    "mean": sum(samples) / len(samples) if samples else 0.0,
+                    "failures": self.outcomes[name].count(False),
+                }
+                for name, samples in self.latencies.items()
+            }
+
+    def language(self) -> list[str]:
+        return common_languages(self.translators.values())
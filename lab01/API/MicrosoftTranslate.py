@@ -1,28 +1,31 @@
 from API.Model.BaseTranslate import BaseTranslate
-import requests
 
 class MicrosoftTranslate(BaseTranslate):
-    def __init__(self, token):
-        self.token = token
+    # Сервис принимает список текстов в одном запросе
+    batch_max_items = 100
+    batch_max_chars = 10000
 
     def translate(self, input_text, input_lang, output_lang) -> str:
+        return self.translate_chunk([input_text], input_lang, output_lang)[0]
+
+    def translate_chunk(self, texts: list[str], input_lang, output_lang) -> list[str]:
         url = "https://microsoft-translator-text-api3.p.rapidapi.com/translate"
 
         querystring = {"to": output_lang, "from": input_lang, "textType": "plain"}
 
-        payload = [{"text": input_text}]
+        payload = [{"text": text} for text in texts]
         headers = {
             "x-rapidapi-key": self.token,
             "x-rapidapi-host": "microsoft-translator-text-api3.p.rapidapi.com",
             "Content-Type": "application/json"
         }
 
-        response = requests.post(url, json=payload, headers=headers, params=querystring)
+        response = self.request("POST", url, json=payload, headers=headers, params=querystring)
         if response.status_code == 200:
             result_json = response.json()
-            ans = result_json[0]["translations"][0]['text']
+            ans = [item["translations"][0]['text'] for item in result_json]
             return ans
-        return ""
+        return [""] * len(texts)
 
 
 
@@ -34,7 +37,7 @@ class MicrosoftTranslate(BaseTranslate):
             "x-rapidapi-host": "microsoft-translator-text-api3.p.rapidapi.com"
         }
 
-        response = requests.get(url, headers=headers)
+        response = self.request("GET", url, headers=headers)
         ans = list()
         if response.status_code == 200:
             result_json = response.json()
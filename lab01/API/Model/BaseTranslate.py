@@ -1,6 +1,133 @@
+import logging
+import random
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from API.Model.RateLimiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
 
 class BaseTranslate(ABC):
+    # Сессии хранятся на уровне класса: все экземпляры одного сервиса (в том числе
+    # созданные заново при перезапуске скрипта Streamlit) используют общий пул соединений
+    _sessions: dict[tuple, requests.Session] = {}
+    _sessions_lock = threading.Lock()
+
+    # Ограничения пакетного запроса к сервису. batch_max_items = 1 означает, что сервис
+    # не умеет переводить несколько текстов за раз и пакет разбивается на одиночные запросы
+    batch_max_items: int = 1
+    batch_max_chars: int = 5000
+    batch_workers: int = 4
+
+    # Ответы, после которых запрос имеет смысл повторить
+    retry_statuses = {429, 500, 502, 503, 504}
+
+    def __init__(self, token, pool_size: int = 10, keep_alive: bool = True,
+                 connect_timeout: float = 3.05, read_timeout: float = 15.0,
+                 rate_limit: float = 5.0, burst: int = 5, max_retries: int = 5,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0, base_url: str | None = None):
+        self.token = token
+        # base_url подменяет адрес RapidAPI, например на локальную заглушку для бенчмарков
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.timeout = (connect_timeout, read_timeout)
+        self.limiter = TokenBucket(rate_limit, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    @property
+    def session(self) -> requests.Session:
+        key = (type(self).__name__, self.pool_size, self.keep_alive)
+        with BaseTranslate._sessions_lock:
+            session = BaseTranslate._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                if not self.keep_alive:
+                    session.headers["Connection"] = "close"
+                BaseTranslate._sessions[key] = session
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        if self.base_url is not None:
+            url = self.base_url.rstrip("/") + urlsplit(url).path
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning("%s: %s, повтор через %.1f с", type(self).__name__, e, delay)
+                time.sleep(delay)
+                continue
+
+            if response.status_code not in self.retry_statuses or attempt == self.max_retries:
+                break
+            delay = self.retry_after(response) or self.backoff(attempt)
+            logger.warning("%s: HTTP %s, повтор через %.1f с", type(self).__name__, response.status_code, delay)
+            # Пауза общая для всех потоков, использующих этот экземпляр сервиса
+            self.limiter.pause(delay)
+
+        if response.status_code != 200:
+            logger.error("%s: HTTP %s %s", type(self).__name__, response.status_code, response.text[:200])
+        return response
+
+    def backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    def retry_after(self, response: requests.Response) -> float | None:
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return min(self.backoff_max, max(0.0, float(value)))
+        except ValueError:
+            pass
+        try:
+            return min(self.backoff_max, max(0.0, parsedate_to_datetime(value).timestamp() - time.time()))
+        except (TypeError, ValueError):
+            return None
+
+    def translate_batch(self, texts: list[str], input_lang, output_lang) -> list[str]:
+        chunks = self.split_batch(texts)
+        if not chunks:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.batch_workers, len(chunks))) as executor:
+            results = executor.map(lambda chunk: self.translate_chunk(chunk, input_lang, output_lang), chunks)
+            return [text for chunk in results for text in chunk]
+
+    def translate_chunk(self, texts: list[str], input_lang, output_lang) -> list[str]:
+        return [self.translate(text, input_lang, output_lang) for text in texts]
+
+    def split_batch(self, texts: list[str]) -> list[list[str]]:
+        chunks = []
+        chunk, chunk_chars = [], 0
+        for text in texts:
+            if chunk and (len(chunk) >= self.batch_max_items or chunk_chars + len(text) > self.batch_max_chars):
+                chunks.append(chunk)
+                chunk, chunk_chars = [], 0
+            chunk.append(text)
+            chunk_chars += len(text)
+        if chunk:
+            chunks.append(chunk)
+        return chunks
 
     @abstractmethod
     def translate(self, input_text, input_lang, output_lang) -> str:
@@ -9,3 +136,10 @@ class BaseTranslate(ABC):
     @abstractmethod
     def language(self) -> list[str]:
         pass
+
+
+def common_languages(translators: Iterable[BaseTranslate]) -> list[str]:
+    # Языки, которые поддерживают все сервисы, в порядке списка первого из них
+    lists = [translator.language() for translator in translators]
+    common = set.intersection(*(set(languages) for languages in lists)) if lists else set()
+    return [language for language in lists[0] if language in common] if lists else []
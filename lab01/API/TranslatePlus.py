@@ -1,12 +1,8 @@
 from API.Model.BaseTranslate import BaseTranslate
-import requests
 
 
 class TranslatePlus(BaseTranslate):
 
-    def __init__(self, token):
-        self.token = token
-
     def translate(self, input_text, input_lang, output_lang) -> str:
         url = "https://translate-plus.p.rapidapi.com/translate"
         payload_plus = {
@@ -21,7 +17,7 @@ class TranslatePlus(BaseTranslate):
             "Content-Type": "application/json"
         }
 
-        response = requests.post(url, json=payload_plus, headers=headers_plus)
+        response = self.request("POST", url, json=payload_plus, headers=headers_plus)
         if response.status_code == 200:
             result_json = response.json()
             output = result_json['translations']['translation']
@@ -36,7 +32,7 @@ class TranslatePlus(BaseTranslate):
             "x-rapidapi-host": "translate-plus.p.rapidapi.com"
         }
 
-        response = requests.get(url, headers=headers)
+        response = self.request("GET", url, headers=headers)
         ans = list()
         if response.status_code == 200:
             result_json = response.json()
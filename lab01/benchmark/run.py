@@ -0,0 +1,98 @@
+import argparse
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from API.DeepTranslate import DeepTranslate
+from API.FanOutTranslate import FanOutTranslate
+from API.GoogleTranslate import GoogleTranslate
+from API.MicrosoftTranslate import MicrosoftTranslate
+from API.TranslatePlus import TranslatePlus
+from benchmark.stub_server import start_stub_server
+
+PROVIDERS = {
+    "GoogleTranslate": GoogleTranslate,
+    "DeepTranslate": DeepTranslate,
+    "TranslatePlus": TranslatePlus,
+    "MicrosoftTranslate": MicrosoftTranslate,
+}
+
+
+def percentile(samples: list[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def report(name: str, latencies: list[float], elapsed: float, requests_count: int):
+    print(f"{name:<40} p50={percentile(latencies, 0.50) * 1000:8.1f} мс "
+          f"p95={percentile(latencies, 0.95) * 1000:8.1f} мс "
+          f"p99={percentile(latencies, 0.99) * 1000:8.1f} мс "
+          f"mean={statistics.mean(latencies) * 1000:8.1f} мс "
+          f"{requests_count / elapsed:8.1f} текстов/с")
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def run_sequential(translator, texts: list[str]) -> tuple[list[float], float]:
+    start = time.perf_counter()
+    latencies = [timed(translator.translate, text, "en", "ru") for text in texts]
+    return latencies, time.perf_counter() - start
+
+
+def run_concurrent(translator, texts: list[str], workers: int) -> tuple[list[float], float]:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        latencies = list(executor.map(lambda text: timed(translator.translate, text, "en", "ru"), texts))
+    return latencies, time.perf_counter() - start
+
+
+def run_batch(translator, texts: list[str], batch_size: int) -> tuple[list[float], float]:
+    start = time.perf_counter()
+    latencies = [
+        timed(translator.translate_batch, texts[i:i + batch_size], "en", "ru")
+        for i in range(0, len(texts), batch_size)
+    ]
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк клиентов перевода на локальной заглушке RapidAPI")
+    parser.add_argument("--requests", type=int, default=200, help="количество текстов на режим")
+    parser.add_argument("--latency", type=float, default=0.05, help="средняя задержка заглушки, с")
+    parser.add_argument("--jitter", type=float, default=0.01, help="разброс задержки заглушки, с")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 429")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--rate-limit", type=float, default=10_000.0, help="лимит клиента, запросов/с")
+    args = parser.parse_args()
+    # Повторы после внедрённых ошибок ожидаемы, в отчёт выводим только итоговые сбои
+    logging.basicConfig(level=logging.ERROR)
+
+    server, base_url = start_stub_server(args.latency, args.jitter, args.error_rate)
+    texts = [f"Benchmark sentence number {i}." for i in range(args.requests)]
+    options = {"base_url": base_url, "rate_limit": args.rate_limit, "burst": args.workers,
+               "pool_size": args.workers, "backoff_base": 0.01}
+    translators = {name: cls(token="stub", **options) for name, cls in PROVIDERS.items()}
+
+    try:
+        for name, translator in translators.items():
+            report(f"{name} translate", *run_sequential(translator, texts[:args.requests // 4]),
+                   args.requests // 4)
+            report(f"{name} concurrent x{args.workers}",
+                   *run_concurrent(translator, texts, args.workers), args.requests)
+            report(f"{name} translate_batch", *run_batch(translator, texts, args.batch_size), args.requests)
+
+        fan_out = FanOutTranslate(translators)
+        report("FanOut translate", *run_sequential(fan_out, texts[:args.requests // 4]), args.requests // 4)
+        fan_out.close()
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+def google(payload):
+    return {"trans": f"[{payload['to']}] {payload['text']}"}
+
+
+def deep(payload):
+    return {"data": {"translations": {"translatedText": f"[{payload['target']}] {payload['q']}"}}}
+
+
+def plus(payload):
+    return {"translations": {"translation": f"[{payload['target']}] {payload['text']}"}}
+
+
+def microsoft(payload):
+    return [{"translations": [{"text": f"[ru] {item['text']}", "to": "ru"}]} for item in payload]
+
+
+# Ответы в формате четырёх сервисов RapidAPI: (x-rapidapi-host, путь) -> (метод, ответ)
+ROUTES = {
+    ("google-translate113.p.rapidapi.com", "/api/v1/translator/text"): ("POST", google),
+    ("google-translate113.p.rapidapi.com", "/api/v1/translator/support-languages"):
+        ("GET", lambda _: [{"code": "en"}, {"code": "ru"}]),
+    ("deep-translate1.p.rapidapi.com", "/language/translate/v2"): ("POST", deep),
+    ("deep-translate1.p.rapidapi.com", "/language/translate/v2/languages"):
+        ("GET", lambda _: {"languages": [{"language": "en"}, {"language": "ru"}]}),
+    ("translate-plus.p.rapidapi.com", "/translate"): ("POST", plus),
+    ("translate-plus.p.rapidapi.com", "/"):
+        ("GET", lambda _: {"supported_languages": {"English": "en", "Russian": "ru"}}),
+    ("microsoft-translator-text-api3.p.rapidapi.com", "/translate"): ("POST", microsoft),
+    ("microsoft-translator-text-api3.p.rapidapi.com", "/languages"):
+        ("GET", lambda _: {"translation": {"en": {}, "ru": {}}}),
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.handle_route("GET")
+
+    def do_POST(self):
+        self.handle_route("POST")
+
+    def handle_route(self, method: str):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length)) if length else None
+
+        config = self.server.config
+        time.sleep(max(0.0, random.gauss(config["latency"], config["jitter"])))
+
+        route = ROUTES.get((self.headers.get("x-rapidapi-host"), urlsplit(self.path).path))
+        if route is None or route[0] != method:
+            self.reply(404, {"message": "not found"})
+        elif random.random() < config["error_rate"]:
+            self.reply(429, {"message": "Too many requests"}, {"Retry-After": "0"})
+        else:
+            self.reply(200, route[1](payload))
+
+    def reply(self, status: int, body, headers: dict[str, str] | None = None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(latency: float = 0.05, jitter: float = 0.01, error_rate: float = 0.0,
+                      port: int = 0) -> tuple[ThreadingHTTPServer, str]:
+    # Запускает заглушку в фоновом потоке и возвращает сервер и его адрес
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.config = {"latency": latency, "jitter": jitter, "error_rate": error_rate}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
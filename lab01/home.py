@@ -2,8 +2,10 @@ import dotenv
 import os
 import streamlit as st
 
+from API.CachedTranslate import CachedTranslate
 from API.DeepTranslate import DeepTranslate
 from API.GoogleTranslate import GoogleTranslate
+from API.HedgedTranslate import HedgedTranslate
 from API.TranslatePlus import TranslatePlus
 from API.MicrosoftTranslate import MicrosoftTranslate
 
@@ -20,18 +22,25 @@ def on_change_services():
     st.session_state["translate_text"] = ""
     st.session_state["input_text"] = ""
 
+FASTEST = "Самый быстрый"
+
+PROVIDERS = {
+    "Google Translate": GoogleTranslate,
+    "Deep Translate": DeepTranslate,
+    "Translate Plus": TranslatePlus,
+    "Microsoft Translate": MicrosoftTranslate,
+}
+
+
+@st.cache_resource
+def get_translator(service: str) -> CachedTranslate:
+    # Объект сервиса создаётся только при первом выборе и переиспользуется между перезапусками
+    if service == FASTEST:
+        # Кэш снаружи хеджирования: задержки замеряются только по реальным запросам к сервисам
+        return CachedTranslate(HedgedTranslate({name: cls(token=os.getenv("TOKEN")) for name, cls in PROVIDERS.items()}))
+    return CachedTranslate(PROVIDERS[service](token=os.getenv("TOKEN")))
+
 def main():
-    gt = GoogleTranslate(token=os.getenv("TOKEN"))
-    dt = DeepTranslate(token=os.getenv("TOKEN"))
-    tp = TranslatePlus(token=os.getenv("TOKEN"))
-    mt = MicrosoftTranslate(token=os.getenv("TOKEN"))
-
-    translate_object = {
-        "Google Translate": gt,
-        "Deep Translate": dt,
-        "Translate Plus": tp,
-        "Microsoft Translate": mt,
-    }
     st.session_state.setdefault("translate_text", "")
     st.session_state.setdefault("input_text", "")
 
@@ -43,9 +52,9 @@ def main():
                         </style>""", unsafe_allow_html=True)
 
     with st.sidebar:
-        sb_translate = st.selectbox("Выберете переводчик", translate_object, key="service", on_change=on_change_services)
+        sb_translate = st.selectbox("Выберете переводчик", [*PROVIDERS, FASTEST], key="service", on_change=on_change_services)
         if sb_translate is not None:
-            list_language = translate_object[sb_translate].language()
+            list_language = get_translator(sb_translate).language()
             col1, col2 = st.columns(2)
             with col1:
                 st.selectbox("Исходный язык:", list_language, key="input_lang", index=None)
@@ -66,7 +75,7 @@ def main():
 
     flag = st.session_state["input_lang"] is None or st.session_state["output_lang"] is None
 
-    st.text_input("Введите текст для перевода:", "", key="input_text", placeholder="Введите текст здесь...", on_change=on_change_text_field, disabled = flag, kwargs={"translate_obj":translate_object[sb_translate]})
+    st.text_input("Введите текст для перевода:", "", key="input_text", placeholder="Введите текст здесь...", on_change=on_change_text_field, disabled = flag, kwargs={"translate_obj":get_translator(sb_translate)})
 
 
 if __name__ == '__main__':
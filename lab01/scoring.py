@@ -0,0 +1,166 @@
+import argparse
+import csv
+import itertools
+import json
+from collections.abc import Iterator
+
+import numpy as np
+
+PROVIDERS = ["GoogleTranslate", "DeepTranslate", "TranslatePlus", "MicrosoftTranslate"]
+METRICS = ["ngram_jaccard", "length_ratio", "edit_similarity"]
+
+
+def read_records(path: str) -> Iterator[dict]:
+    # JSONL читается построчно, поэтому файл любого размера не загружается в память целиком.
+    # Обычный JSON-массив (idioms.json) загружается полностью
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from json.load(f)
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[dict[str, list[str]]]:
+    chunk = {provider: [] for provider in PROVIDERS}
+    size = 0
+    for record in read_records(path):
+        translation = record.get("translation", {})
+        for provider in PROVIDERS:
+            chunk[provider].append(translation.get(provider, "") or "")
+        size += 1
+        if size == chunk_size:
+            yield chunk
+            chunk = {provider: [] for provider in PROVIDERS}
+            size = 0
+    if size:
+        yield chunk
+
+
+def encode(texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    # Тексты в матрицу кодов символов, дополненную -1, и вектор длин
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+    codes = np.full((len(texts), max(1, lengths.max(initial=0))), -1, dtype=np.int32)
+    for row, text in enumerate(texts):
+        codes[row, :len(text)] = np.frombuffer(text.encode("utf-32-le"), dtype=np.int32)
+    return codes, lengths
+
+
+def ngram_keys(codes: np.ndarray, lengths: np.ndarray, n: int) -> np.ndarray:
+    # Уникальные ключи (номер строки, хэш n-граммы) для всех текстов пакета сразу
+    rows, width = codes.shape
+    if width < n:
+        return np.empty(0, dtype=np.int64)
+    windows = np.lib.stride_tricks.sliding_window_view(codes.astype(np.int64), n, axis=1)
+    hashes = np.zeros(windows.shape[:2], dtype=np.int64)
+    for k in range(n):
+        hashes = (hashes * 1_000_003 + windows[..., k]) & 0xFFFFFFFF
+    valid = np.arange(windows.shape[1])[None, :] <= (lengths[:, None] - n)
+    keys = (np.arange(rows, dtype=np.int64)[:, None] << 32) | hashes
+    return np.unique(keys[valid])
+
+
+def ngram_jaccard(a: tuple[np.ndarray, np.ndarray], b: tuple[np.ndarray, np.ndarray], n: int = 3) -> np.ndarray:
+    rows = len(a[1])
+    keys_a = ngram_keys(*a, n)
+    keys_b = ngram_keys(*b, n)
+    count_a = np.bincount(keys_a >> 32, minlength=rows)
+    count_b = np.bincount(keys_b >> 32, minlength=rows)
+    common = np.bincount(keys_a[np.isin(keys_a, keys_b, assume_unique=True)] >> 32, minlength=rows)
+    union = count_a + count_b - common
+    return np.divide(common, union, out=np.ones(rows), where=union > 0)
+
+
+def length_ratio(a: tuple[np.ndarray, np.ndarray], b: tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    shortest = np.minimum(a[1], b[1])
+    longest = np.maximum(a[1], b[1])
+    return np.divide(shortest, longest, out=np.ones(len(longest)), where=longest > 0)
+
+
+def edit_distance(a: tuple[np.ndarray, np.ndarray], b: tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    # Левенштейн для всего пакета: цикл только по символам первого текста,
+    # строка динамики считается векторно по всем парам и позициям второго текста
+    codes_a, lengths_a = a
+    codes_b, lengths_b = b
+    rows, width = codes_b.shape
+    # int32 вдвое уменьшает объём данных, которые гоняются через память на каждом шаге
+    columns = np.arange(width + 1, dtype=np.int32)
+    row = np.broadcast_to(columns, (rows, width + 1)).copy()
+    current = np.empty_like(row)
+    substitution = np.empty((rows, width), dtype=np.int32)
+    distance = lengths_b.copy()
+
+    for i in range(codes_a.shape[1]):
+        np.not_equal(codes_a[:, i, None], codes_b, out=substitution)
+        substitution += row[:, :-1]
+        current[:, 0] = i + 1
+        np.add(row[:, 1:], 1, out=current[:, 1:])
+        np.minimum(current[:, 1:], substitution, out=current[:, 1:])
+        # Вставки: row[j] = min(current[k] + (j - k)) по всем k <= j
+        current -= columns
+        np.minimum.accumulate(current, axis=1, out=row)
+        row += columns
+
+        finished = lengths_a == i + 1
+        distance[finished] = row[finished, lengths_b[finished]]
+    return distance
+
+
+def edit_similarity(a: tuple[np.ndarray, np.ndarray], b: tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    longest = np.maximum(a[1], b[1])
+    return 1 - np.divide(edit_distance(a, b), longest, out=np.zeros(len(longest)), where=longest > 0)
+
+
+def score(path: str, chunk_size: int = 1000) -> dict[tuple[str, str], dict[str, float]]:
+    sums = {pair: dict.fromkeys(METRICS, 0.0) for pair in itertools.combinations(PROVIDERS, 2)}
+    count = 0
+    for chunk in read_chunks(path, chunk_size):
+        encoded = {provider: encode(texts) for provider, texts in chunk.items()}
+        for first, second in sums:
+            a, b = encoded[first], encoded[second]
+            sums[(first, second)]["ngram_jaccard"] += ngram_jaccard(a, b).sum()
+            sums[(first, second)]["length_ratio"] += length_ratio(a, b).sum()
+            sums[(first, second)]["edit_similarity"] += edit_similarity(a, b).sum()
+        count += len(chunk[PROVIDERS[0]])
+
+    return {
+        pair: {metric: value / count if count else 0.0 for metric, value in metrics.items()}
+        for pair, metrics in sums.items()
+    }
+
+
+def provider_ranking(summary: dict[tuple[str, str], dict[str, float]]) -> list[tuple[str, float]]:
+    # Средняя схожесть сервиса со всеми остальными: чем выше, тем ближе он к "консенсусу"
+    agreement = {provider: [] for provider in PROVIDERS}
+    for (first, second), metrics in summary.items():
+        value = float(np.mean([metrics[metric] for metric in METRICS]))
+        agreement[first].append(value)
+        agreement[second].append(value)
+    ranking = [(provider, float(np.mean(values))) for provider, values in agreement.items()]
+    return sorted(ranking, key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Попарная согласованность переводов в idioms.json")
+    parser.add_argument("path", nargs="?", default="idioms.json", help="idioms.json или idioms.jsonl")
+    parser.add_argument("--output", default="agreement.csv")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    summary = score(args.path, args.chunk_size)
+    with open(args.output, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["first", "second", *METRICS])
+        for (first, second), metrics in summary.items():
+            writer.writerow([first, second, *(f"{metrics[metric]:.4f}" for metric in METRICS)])
+
+    for (first, second), metrics in summary.items():
+        print(f"{first:<20} {second:<20} " + " ".join(f"{metric}={metrics[metric]:.3f}" for metric in METRICS))
+    print()
+    for provider, value in provider_ranking(summary):
+        print(f"{provider:<20} {value:.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,59 +1,172 @@
 import requests
 import json
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from bs4 import BeautifulSoup
 import dotenv
 
+from API.CachedTranslate import CachedTranslate
 from API.DeepTranslate import DeepTranslate
+from API.FanOutTranslate import FanOutTranslate
 from API.GoogleTranslate import GoogleTranslate
 from API.MicrosoftTranslate import MicrosoftTranslate
 from API.TranslatePlus import TranslatePlus
 
 
-def translate(text: str, input_lang: str = "en", output_lang: str = "ru") -> dict[str, str]:
-    gt = GoogleTranslate(token=os.getenv("TOKEN"))
-    dt = DeepTranslate(token=os.getenv("TOKEN"))
-    tp = TranslatePlus(token=os.getenv("TOKEN"))
-    mt = MicrosoftTranslate(token=os.getenv("TOKEN"))
-
-    translation = {
-        "GoogleTranslate": gt.translate(text, input_lang=input_lang, output_lang=output_lang),
-        "DeepTranslate": dt.translate(text, input_lang=input_lang, output_lang=output_lang),
-        "TranslatePlus": tp.translate(text, input_lang=input_lang, output_lang=output_lang),
-        "MicrosoftTranslate": mt.translate(text, input_lang=input_lang, output_lang=output_lang),
+@lru_cache(maxsize=1)
+def fan_out() -> FanOutTranslate:
+    translators = {
+        "GoogleTranslate": CachedTranslate(GoogleTranslate(token=os.getenv("TOKEN"))),
+        "DeepTranslate": CachedTranslate(DeepTranslate(token=os.getenv("TOKEN"))),
+        "TranslatePlus": CachedTranslate(TranslatePlus(token=os.getenv("TOKEN"))),
+        "MicrosoftTranslate": CachedTranslate(MicrosoftTranslate(token=os.getenv("TOKEN"))),
     }
+    return FanOutTranslate(translators, deadline=15.0)
 
-    return translation
 
+def translate(text: str, input_lang: str = "en", output_lang: str = "ru") -> dict[str, str]:
+    # Запросы ко всем сервисам уходят одновременно, ждём самый медленный из них
+    return fan_out().translate_all(text, input_lang=input_lang, output_lang=output_lang)
 
 
-def main():
-    main_url = "https://www.native-english.ru/idioms"
-    url = "https://www.native-english.ru/"
-    response = requests.get(main_url)
+
+def fetch_idioms(session: requests.Session, main_url: str) -> list[dict[str, str]]:
+    response = session.get(main_url)
     soup = BeautifulSoup(response.text, "html.parser")
 
     div_idioms = soup.find('div', class_='stack__primary')
     li_elements = div_idioms.find_all('li')
-    ans = []
+    idioms = []
     for i in li_elements:
-        idiom, desc = i.text.strip(), i.find("meta").get("content")
-        link = i.find('a').get("href")
+        idioms.append({
+            "idiom": i.text.strip(),
+            "desc": i.find("meta").get("content"),
+            "link": i.find('a').get("href"),
+        })
+    return idioms
+
+
+def fetch_sentence(session: requests.Session, url: str, link: str) -> str:
+    response = session.get(f"{url}/{link}")
+    soup = BeautifulSoup(response.text, "html.parser")
+    div_sentences = soup.find('div', class_='example dtext')
+    return div_sentences.text.strip()
+
+
+def is_complete(record: dict) -> bool:
+    # Пустой перевод означает ошибку сервиса - такую идиому нужно перевести заново
+    return bool(record["translation"]) and all(record["translation"].values())
+
 
-        response = requests.get(f"{url}/{link}")
-        soup = BeautifulSoup(response.text, "html.parser")
-        div_sentences = soup.find('div', class_='example dtext')
-        sentences = div_sentences.text.strip()
+def load_checkpoint(path: str) -> dict[str, dict]:
+    # Уже обработанные идиомы из JSONL; оборванная при прерывании последняя строка
+    # и записи с неполными переводами пропускаются
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if is_complete(record):
+                done[record["idiom"]] = record
+    return done
+
+
+def translation_stage(pages: queue.Queue, output: str, batch_size: int):
+    # Отдельный поток: собирает страницы в пакеты, переводит и сразу дописывает в JSONL
+    try:
+        write_translations(pages, output, batch_size)
+    except Exception as e:
+        # Поток завершается, main() замечает это и перестаёт ставить страницы в очередь
+        print(f"Перевод остановлен: {e}")
+
+
+def write_translations(pages: queue.Queue, output: str, batch_size: int):
+    with open(output, 'a', encoding='utf-8') as f:
+        finished = False
+        while not finished:
+            batch = [pages.get()]
+            while len(batch) < batch_size:
+                try:
+                    batch.append(pages.get(timeout=1.0))
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                batch.pop()
+                finished = True
+            if not batch:
+                continue
+
+            translations = fan_out().translate_all_batch([item["sentence"] for item in batch], "en", "ru")
+            for item, translation in zip(batch, translations):
+                record = {
+                    "idiom": item["idiom"],
+                    "desc": item["desc"],
+                    "sentence": item["sentence"],
+                    "translation": translation,
+                }
+                if not is_complete(record):
+                    # Не попадёт в чекпоинт и будет переведена при следующем запуске
+                    failed = [name for name, text in translation.items() if not text]
+                    print(f"Не удалось перевести {item['idiom']}: {', '.join(failed)}")
+                    continue
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def put_page(pages: queue.Queue, item, translator: threading.Thread) -> bool:
+    # Очередь ограничена, поэтому без живого потока перевода put заблокировался бы навсегда
+    while translator.is_alive():
+        try:
+            pages.put(item, timeout=1.0)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def main(output: str = "idioms.jsonl", workers: int = 8, batch_size: int = 20):
+    main_url = "https://www.native-english.ru/idioms"
+    url = "https://www.native-english.ru/"
+    session = requests.Session()
 
-        tmp = {
-            "idiom": idiom,
-            "desc": desc,
-            "sentence": sentences,
-            "translation": translate(sentences),
-        }
+    idioms = fetch_idioms(session, main_url)
+    done = load_checkpoint(output)
+    pending = [item for item in idioms if item["idiom"] not in done]
+    print(f"Готово {len(done)}, осталось {len(pending)} из {len(idioms)}")
 
-        ans.append(tmp)
+    pages = queue.Queue(maxsize=workers * batch_size)
+    translator = threading.Thread(target=translation_stage, args=(pages, output, batch_size))
+    translator.start()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(fetch_sentence, session, url, item["link"]): item for item in pending}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    sentence = future.result()
+                except Exception as e:
+                    # Страница будет загружена повторно при следующем запуске
+                    print(f"Не удалось загрузить {item['idiom']}: {e}")
+                    continue
+                if not put_page(pages, {**item, "sentence": sentence}, translator):
+                    for rest in futures:
+                        rest.cancel()
+                    break
+    finally:
+        put_page(pages, None, translator)
+        translator.join()
 
+    # Итоговый idioms.json в порядке списка на сайте
+    done = load_checkpoint(output)
+    ans = [done[item["idiom"]] for item in idioms if item["idiom"] in done]
     with open('idioms.json', 'w', encoding='utf-8') as f:
         json.dump(ans, f, ensure_ascii=False, indent=4)
 
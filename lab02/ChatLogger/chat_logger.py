@@ -2,9 +2,17 @@
 Модуль для логирования чатов в JSON файл.
 
 Этот модуль содержит класс ChatLogger, который позволяет сохранять
-данные чатов в формате JSON.
+данные чатов в формате JSON, и класс StreamingChatLogger, который
+дописывает каждое сообщение в JSONL файл с ротацией.
 """
+import atexit
+import gzip
 import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
 
 
 class ChatLogger:
@@ -35,3 +43,172 @@ class ChatLogger:
 
         with open(self.filename, 'w', encoding='utf-8') as file:
             json.dump(data, file, ensure_ascii=False, indent=4)
+
+
+class StreamingChatLogger:
+    """
+    Класс для потокового логирования сообщений чатов в JSONL файл.
+
+    Каждое сообщение дописывается отдельной строкой с идентификатором сессии,
+    поэтому стоимость записи не зависит от длины чата, а сообщения разных
+    сессий не перезаписывают друг друга. Запись буферизуется, fsync выполняется
+    не чаще, чем раз в fsync_interval секунд, а фоновый поток синхронизирует
+    оставшиеся в буфере сообщения не позже чем через fsync_interval, даже если
+    новых сообщений нет. При завершении процесса логгер закрывается через atexit.
+    Файл ротируется по размеру и по времени, ротированные файлы при необходимости
+    сжимаются gzip в фоне.
+    """
+
+    def __init__(self, filename: str = "logger.jsonl", max_bytes: int = 10 * 1024 * 1024,
+                 rotate_interval: float = 24 * 3600, fsync_interval: float = 1.0,
+                 compress: bool = True) -> None:
+        """
+        Инициализация экземпляра класса StreamingChatLogger.
+
+        Args:
+            filename (str): Имя JSONL файла. По умолчанию используется "logger.jsonl".
+            max_bytes (int): Размер файла, после которого он ротируется; 0 отключает ротацию по размеру.
+            rotate_interval (float): Период ротации в секундах; 0 отключает ротацию по времени.
+            fsync_interval (float): Интервал между fsync в секундах.
+            compress (bool): Сжимать ли ротированные файлы gzip.
+        Returns:
+            None
+        """
+
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.fsync_interval = fsync_interval
+        self.compress = compress
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._closed = False
+        self._open()
+
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="chat-logger-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def _open(self) -> None:
+        """
+        Открывает текущий файл на дозапись.
+        """
+
+        self._file = open(self.filename, "a", encoding="utf-8", buffering=64 * 1024)  # pylint: disable=consider-using-with
+        self._size = self._file.tell()
+        self._opened_at = time.time()
+        self._last_sync = time.monotonic()
+
+    def log(self, session_id: str, role: str, content: str) -> None:
+        """
+        Дописывает одно сообщение чата.
+
+        Args:
+            session_id (str): Идентификатор сессии чата.
+            role (str): Роль автора сообщения ("user" или "assistant").
+            content (str): Текст сообщения.
+        """
+
+        record = {
+            "session_id": session_id,
+            "timestamp": time.time(),
+            "role": role,
+            "content": content,
+        }
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+
+        with self._lock:
+            if self._should_rotate():
+                self._rotate()
+            self._file.write(line)
+            self._size += len(line.encode("utf-8"))
+            self._dirty = True
+            if time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync()
+
+    def flush(self) -> None:
+        """
+        Сбрасывает буфер и синхронизирует файл с диском.
+        """
+
+        with self._lock:
+            if not self._closed:
+                self._sync()
+
+    def close(self) -> None:
+        """
+        Останавливает фоновую синхронизацию, сбрасывает буфер и закрывает файл.
+        Повторные вызовы ничего не делают.
+        """
+
+        self._stopped.set()
+        if self._flusher is not threading.current_thread():
+            self._flusher.join()
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._sync()
+            self._file.close()
+        atexit.unregister(self.close)
+
+    def _flush_periodically(self) -> None:
+        """
+        Фоновый поток: раз в fsync_interval синхронизирует несброшенные сообщения.
+        """
+
+        while not self._stopped.wait(self.fsync_interval):
+            with self._lock:
+                if self._dirty and not self._closed:
+                    self._sync()
+
+    def _sync(self) -> None:
+        """
+        Сбрасывает буфер файла и выполняет fsync.
+        """
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+        self._dirty = False
+
+    def _should_rotate(self) -> bool:
+        """
+        Проверяет, пора ли ротировать файл по размеру или по времени.
+
+        Returns:
+            bool: True, если файл нужно ротировать.
+        """
+
+        if self._size == 0:
+            return False
+        if self.max_bytes and self._size >= self.max_bytes:
+            return True
+        return bool(self.rotate_interval) and time.time() - self._opened_at >= self.rotate_interval
+
+    def _rotate(self) -> None:
+        """
+        Закрывает текущий файл, переименовывает его с отметкой времени и открывает новый.
+        """
+
+        self._sync()
+        self._file.close()
+        rotated = f"{self.filename}.{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+        os.replace(self.filename, rotated)
+        self._open()
+        if self.compress:
+            threading.Thread(target=self._compress, args=(rotated,), daemon=True).start()
+
+    @staticmethod
+    def _compress(path: str) -> None:
+        """
+        Сжимает ротированный файл gzip и удаляет исходный.
+
+        Args:
+            path (str): Путь к ротированному файлу.
+        """
+
+        with open(path, "rb") as source, gzip.open(f"{path}.gz", "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.remove(path)
@@ -0,0 +1,183 @@
+"""
+Модуль для хранения состояния диалогов с моделью между репликами.
+
+Для каждой сессии хранится кэш ключей и значений (past_key_values) трансформера,
+чтобы на следующей реплике модель обрабатывала только новые токены. Кэш - только
+оптимизация: по истории сообщений сессия восстанавливается заново, поэтому ее
+вытеснение не меняет ответов модели.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class ChatSession:
+    """
+    Состояние одного диалога.
+
+    Attributes:
+        session_id (str): Идентификатор сессии.
+        past_key_values: Кэш внимания для уже обработанных токенов или None.
+        texts (list[str]): Тексты сообщений беседы, которым соответствуют token_ids.
+        token_ids (list[int]): Токены беседы в контексте модели (при переполнении - ее конец).
+        cached_tokens (int): Количество первых токенов token_ids, покрытых кэшем.
+        nbytes (int): Оценка объема памяти, занятого кэшем.
+        last_used (float): Время последнего обращения.
+        lock (threading.Lock): Замок, не позволяющий генерировать в одной сессии параллельно.
+    """
+
+    def __init__(self, session_id: str) -> None:
+        """
+        Создает пустую сессию.
+
+        Args:
+            session_id (str): Идентификатор сессии.
+
+        Returns:
+            None
+        """
+
+        self.session_id = session_id
+        self.past_key_values = None
+        self.texts: list[str] = []
+        self.token_ids: list[int] = []
+        self.cached_tokens = 0
+        self.nbytes = 0
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reset(self) -> None:
+        """
+        Сбрасывает беседу и кэш сессии, например если история сообщений изменилась.
+
+        Returns:
+            None
+        """
+
+        self.texts = []
+        self.token_ids = []
+        self.drop_cache()
+
+    def crop_cache(self, length: int) -> None:
+        """
+        Оставляет в кэше внимания только первые length токенов беседы.
+
+        Args:
+            length (int): Количество токенов, которые остаются в кэше.
+
+        Returns:
+            None
+        """
+
+        if length >= self.cached_tokens:
+            return
+        if length <= 0 or self.past_key_values is None:
+            self.drop_cache()
+            return
+        if hasattr(self.past_key_values, "crop"):
+            self.past_key_values.crop(length)
+        else:
+            self.past_key_values = tuple(
+                tuple(tensor[:, :, :length] for tensor in layer) for layer in self.past_key_values)
+        self.nbytes = self.nbytes * length // self.cached_tokens
+        self.cached_tokens = length
+
+    def drop_cache(self) -> None:
+        """
+        Сбрасывает только кэш внимания; токены беседы будут обработаны заново.
+
+        Returns:
+            None
+        """
+
+        self.past_key_values = None
+        self.cached_tokens = 0
+        self.nbytes = 0
+
+
+class SessionCache:
+    """
+    Потокобезопасное LRU-хранилище сессий с ограничением суммарного объема кэшей.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """
+        Создает пустое хранилище.
+
+        Args:
+            max_bytes (int): Максимальный суммарный объем кэшей всех сессий в байтах.
+
+        Returns:
+            None
+        """
+
+        self.max_bytes = max_bytes
+        self._sessions: OrderedDict[str, ChatSession] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> ChatSession:
+        """
+        Возвращает сессию по идентификатору, создавая ее при необходимости.
+
+        Args:
+            session_id (str): Идентификатор сессии.
+
+        Returns:
+            ChatSession: Сессия диалога.
+        """
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = ChatSession(session_id)
+            self._sessions.move_to_end(session_id)
+            session.last_used = time.monotonic()
+            return session
+
+    def update(self, session: ChatSession) -> None:
+        """
+        Учитывает новый размер кэша сессии и вытесняет давно не использованные сессии,
+        пока суммарный объем превышает лимит.
+
+        Args:
+            session (ChatSession): Сессия, кэш которой изменился.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            total = sum(item.nbytes for item in self._sessions.values())
+            for session_id in list(self._sessions):
+                if total <= self.max_bytes:
+                    break
+                victim = self._sessions[session_id]
+                if victim is session:
+                    continue
+                total -= victim.nbytes
+                del self._sessions[session_id]
+
+    def drop(self, session_id: str) -> None:
+        """
+        Удаляет сессию и ее кэш.
+
+        Args:
+            session_id (str): Идентификатор сессии.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def total_bytes(self) -> int:
+        """
+        Возвращает суммарный объем кэшей всех сессий.
+
+        Returns:
+            int: Объем в байтах.
+        """
+
+        with self._lock:
+            return sum(item.nbytes for item in self._sessions.values())
@@ -0,0 +1,68 @@
+"""
+Модуль с оптимизациями инференса RuGPT-3 на CPU.
+
+Содержит динамическое int8-квантование линейных слоев и настройку
+количества потоков torch.
+"""
+import torch
+from torch import nn
+from transformers import PreTrainedModel
+from transformers.pytorch_utils import Conv1D
+
+
+def conv1d_to_linear(module: nn.Module) -> nn.Module:
+    """
+    Заменяет слои Conv1D модели GPT-2 на эквивалентные nn.Linear.
+
+    В GPT-2 проекции внимания и MLP реализованы как Conv1D (веса хранятся
+    транспонированными), поэтому динамическое квантование, которое работает
+    только с nn.Linear, их не затрагивает без такой замены.
+
+    Args:
+        module (nn.Module): Модель или ее подмодуль.
+
+    Returns:
+        nn.Module: Тот же модуль с замененными слоями.
+    """
+    for name, child in module.named_children():
+        if isinstance(child, Conv1D):
+            in_features, out_features = child.weight.shape
+            linear = nn.Linear(in_features, out_features)
+            linear.weight = nn.Parameter(child.weight.detach().t().contiguous())
+            linear.bias = nn.Parameter(child.bias.detach().clone())
+            setattr(module, name, linear)
+        else:
+            conv1d_to_linear(child)
+    return module
+
+
+def quantize_dynamic_int8(model: PreTrainedModel) -> PreTrainedModel:
+    """
+    Применяет динамическое int8-квантование ко всем линейным слоям модели.
+
+    Веса линейных слоев, включая lm_head, хранятся в int8, активации квантуются
+    на лету. Таблица эмбеддингов остается в fp32.
+
+    Args:
+        model (PreTrainedModel): Модель в режиме fp32.
+
+    Returns:
+        PreTrainedModel: Квантованная модель в режиме eval.
+    """
+    model.eval()
+    conv1d_to_linear(model.transformer)
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def configure_threads(num_threads: int) -> None:
+    """
+    Задает количество intra-op потоков torch для процесса.
+
+    Args:
+        num_threads (int): Количество потоков; 0 оставляет значение torch по умолчанию.
+
+    Returns:
+        None
+    """
+    if num_threads > 0:
+        torch.set_num_threads(num_threads)
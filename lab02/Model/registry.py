@@ -0,0 +1,130 @@
+"""
+Модуль с общим для процесса реестром загруженных моделей.
+
+Реестр позволяет загружать веса и токенизатор один раз на процесс и
+переиспользовать их во всех сессиях Streamlit и экземплярах RuGPT3.
+"""
+import gc
+import threading
+from collections import OrderedDict
+
+from transformers import GPT2LMHeadModel, GPT2Tokenizer
+
+from Model.optimization import quantize_dynamic_int8
+from Model.snapshot import load_pretrained
+
+
+class ModelRegistry:
+    """
+    Потокобезопасный реестр моделей с ключом (model_path, tokenizer_path, quantize).
+
+    Хранит не более max_models моделей одновременно; при превышении лимита
+    выгружается модель, которая дольше всего не использовалась.
+    """
+
+    def __init__(self, max_models: int = 2) -> None:
+        """
+        Создает пустой реестр.
+
+        Args:
+            max_models (int): Максимальное количество одновременно загруженных моделей.
+
+        Returns:
+            None
+        """
+
+        self.max_models = max_models
+        self._models: OrderedDict[tuple[str, str, bool], tuple[GPT2LMHeadModel, GPT2Tokenizer]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: dict[tuple[str, str, bool], threading.Lock] = {}
+
+    def get(self, model_path: str, tokenizer_path: str,
+            quantize: bool = False) -> tuple[GPT2LMHeadModel, GPT2Tokenizer]:
+        """
+        Возвращает модель и токенизатор, загружая их при первом обращении.
+
+        Args:
+            model_path (str): Путь или имя модели в Hugging Face Hub.
+            tokenizer_path (str): Путь или имя токенизатора в Hugging Face Hub.
+            quantize (bool): Загрузить модель с динамическим int8-квантованием.
+
+        Returns:
+            tuple[GPT2LMHeadModel, GPT2Tokenizer]: Загруженные модель и токенизатор.
+        """
+
+        key = (model_path, tokenizer_path, quantize)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+            loading = self._loading.setdefault(key, threading.Lock())
+
+        # Загрузка идет вне общего замка, чтобы не блокировать другие модели,
+        # а замок ключа не дает загрузить одну и ту же модель дважды
+        with loading:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key]
+
+            # Если есть локальный снимок, веса отображаются в память без копирования
+            model, tokenizer = load_pretrained(model_path, tokenizer_path)
+            if quantize:
+                model = quantize_dynamic_int8(model)
+
+            with self._lock:
+                self._models[key] = (model, tokenizer)
+                self._loading.pop(key, None)
+                while len(self._models) > self.max_models:
+                    self._models.popitem(last=False)
+            gc.collect()
+            return model, tokenizer
+
+    def evict(self, model_path: str, tokenizer_path: str, quantize: bool = False) -> bool:
+        """
+        Выгружает модель из реестра.
+
+        RuGPT3 не хранит ссылок на модель, поэтому память освобождается сразу, кроме
+        случаев, когда модель еще используется идущей генерацией: тогда - после ее завершения.
+
+        Args:
+            model_path (str): Путь или имя модели.
+            tokenizer_path (str): Путь или имя токенизатора.
+            quantize (bool): Выгрузить квантованный вариант модели.
+
+        Returns:
+            bool: True, если модель была загружена и выгружена.
+        """
+
+        with self._lock:
+            removed = self._models.pop((model_path, tokenizer_path, quantize), None) is not None
+        if removed:
+            gc.collect()
+        return removed
+
+    def clear(self) -> None:
+        """
+        Выгружает все модели из реестра.
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self._models.clear()
+        gc.collect()
+
+    def loaded(self) -> list[tuple[str, str, bool]]:
+        """
+        Возвращает ключи загруженных моделей от самой старой к самой свежей.
+
+        Returns:
+            list[tuple[str, str, bool]]: Список ключей (model_path, tokenizer_path, quantize).
+        """
+
+        with self._lock:
+            return list(self._models)
+
+
+# Общий реестр процесса
+registry = ModelRegistry()
@@ -4,9 +4,25 @@
 Этот модуль содержит класс RuGPT3, который предоставляет интерфейс
 для генерации текстов на русском языке с использованием модели RuGPT-3.
 """
-from transformers import GPT2LMHeadModel, GPT2Tokenizer
+from collections.abc import Iterator
+from threading import Thread
+
+import torch
+from transformers import GPT2LMHeadModel, GPT2Tokenizer, TextIteratorStreamer
+from transformers.generation.logits_process import (LogitsProcessorList, MinLengthLogitsProcessor,
+                                                    NoRepeatNGramLogitsProcessor, TemperatureLogitsWarper,
+                                                    TopKLogitsWarper, TopPLogitsWarper)
+from textgen_common.metrics import configure_exporter, metrics
 import yaml
 
+from Model.chat_session import ChatSession, SessionCache
+from Model.optimization import configure_threads
+from Model.registry import ModelRegistry, registry as default_registry
+
+
+# Разделитель сообщений беседы в контексте модели
+TURN_SEPARATOR = "\n"
+
 
 class RuGPT3:
     """
@@ -18,13 +34,16 @@ class RuGPT3:
     Основная функция класса включает генерацию текста на основе входного текста от пользователя.
     """
 
-    def __init__(self, config_path: str = "./Model/config.yaml") -> None:
+    def __init__(self, config_path: str = "./Model/config.yaml",
+                 registry: ModelRegistry | None = None) -> None:
         """
         Создает и инициализирует экземпляр класса RuGPT3.
 
         Args:
             config_path (str): Путь к конфигурационному файлу.
             По умолчанию используется "./Model/config.yaml".
+            registry (ModelRegistry | None): Реестр, из которого берутся модель и токенизатор.
+            По умолчанию используется общий реестр процесса.
 
         Returns:
             None
@@ -49,9 +68,51 @@ class RuGPT3:
         self.top_p = self.config['generation_params']['top_p']
         self.temperature = self.config['generation_params']['temperature']
 
-        # Загружаем модель и токенизатор
-        self.tokenizer = GPT2Tokenizer.from_pretrained(self.tokenizer_path)
-        self.model = GPT2LMHeadModel.from_pretrained(self.model_path)
+        # Параметры оптимизированного режима для CPU
+        optimization = self.config.get('optimization', {})
+        self.cpu_mode = optimization.get('cpu_mode', False)
+        self.quantize = self.cpu_mode and optimization.get('quantize', False)
+        self.num_threads = optimization.get('num_threads', 0)
+        if self.cpu_mode:
+            configure_threads(self.num_threads)
+
+        # Модель и токенизатор загружаются один раз на процесс и разделяются всеми экземплярами.
+        # Экземпляр не хранит ссылок на них, а берет их из реестра при каждом обращении,
+        # поэтому выгрузка модели из реестра освобождает память и при живых экземплярах
+        self.registry = registry or default_registry
+        self.registry.get(self.model_path, self.tokenizer_path, quantize=self.quantize)
+
+        # Кэши внимания диалоговых сессий с общим лимитом памяти
+        max_cache_mb = self.config.get('chat_sessions', {}).get('max_cache_mb', 512)
+        self.sessions = SessionCache(max_cache_mb * 1024 * 1024)
+
+        # Экспорт метрик генерации
+        metrics_config = self.config.get('metrics', {})
+        configure_exporter(metrics_config.get('exporter', 'none'),
+                           metrics_config.get('csv_path', 'generation_metrics.csv'),
+                           metrics_config.get('port', 9100))
+
+    @property
+    def model(self) -> GPT2LMHeadModel:
+        """
+        Возвращает модель из реестра, загружая ее заново, если она была выгружена.
+
+        Returns:
+            GPT2LMHeadModel: Модель.
+        """
+
+        return self.registry.get(self.model_path, self.tokenizer_path, quantize=self.quantize)[0]
+
+    @property
+    def tokenizer(self) -> GPT2Tokenizer:
+        """
+        Возвращает токенизатор из реестра, загружая его заново, если модель была выгружена.
+
+        Returns:
+            GPT2Tokenizer: Токенизатор.
+        """
+
+        return self.registry.get(self.model_path, self.tokenizer_path, quantize=self.quantize)[1]
 
     def generate_text(self, input_text: str) -> str:
         """
@@ -62,22 +123,295 @@ class RuGPT3:
             str: Сгенерированный ответ от модели GPT
         """
 
+        timer = metrics.measure(self.name)
+
         # Токенизация входного текста
         input_ids = self.tokenizer.encode(input_text, return_tensors="pt")
+        timer.tokenized(input_ids.shape[1])
 
         # Генерация текста с параметрами
-        output = self.model.generate(
-            input_ids,
-            max_length=self.max_length,
-            min_length=self.min_length,
-            num_beams=self.num_beams,
-            num_return_sequences=self.num_return_sequences,
-            no_repeat_ngram_size=self.no_repeat_ngram_size,
-            do_sample=self.do_sample,
-            top_k=self.top_k,
-            top_p=self.top_p,
-            temperature=self.temperature,
-        )
+        with torch.inference_mode():
+            output = self.model.generate(
+                input_ids,
+                max_length=self.max_length,
+                min_length=self.min_length,
+                num_beams=self.num_beams,
+                num_return_sequences=self.num_return_sequences,
+                no_repeat_ngram_size=self.no_repeat_ngram_size,
+                do_sample=self.do_sample,
+                top_k=self.top_k,
+                top_p=self.top_p,
+                temperature=self.temperature,
+                logits_processor=LogitsProcessorList([timer]),
+            )
+        timer.finish(output.shape[1] - input_ids.shape[1])
 
         # Декодируем и возвращаем сгенерированный текст
         return self.tokenizer.decode(output[0], skip_special_tokens=True)
+
+    def stream_text(self, input_text: str) -> Iterator[str]:
+        """
+        Генерирует ответ и отдает его частями по мере появления новых токенов.
+
+        Генерация выполняется в отдельном потоке, а декодированный текст передается
+        через TextIteratorStreamer. Beam search в transformers не поддерживает
+        потоковую выдачу, поэтому в этом режиме используется num_beams=1.
+
+        Args:
+            input_text (str): Пользовательский текст
+        Returns:
+            Iterator[str]: Фрагменты сгенерированного ответа
+        """
+
+        timer = metrics.measure(self.name)
+        input_ids = self.tokenizer.encode(input_text, return_tensors="pt")
+        timer.tokenized(input_ids.shape[1])
+        streamer = TextIteratorStreamer(self.tokenizer, skip_special_tokens=True)
+        errors = []
+        outputs = []
+
+        def generate() -> None:
+            try:
+                with torch.inference_mode():
+                    outputs.append(self.model.generate(
+                        input_ids,
+                        max_length=self.max_length,
+                        min_length=self.min_length,
+                        num_beams=1,
+                        num_return_sequences=1,
+                        no_repeat_ngram_size=self.no_repeat_ngram_size,
+                        do_sample=self.do_sample,
+                        top_k=self.top_k,
+                        top_p=self.top_p,
+                        temperature=self.temperature,
+                        streamer=streamer,
+                        logits_processor=LogitsProcessorList([timer]),
+                    ))
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                # Без end() итератор стримера ждал бы новых токенов бесконечно
+                errors.append(e)
+                streamer.end()
+
+        thread = Thread(target=generate, daemon=True)
+        thread.start()
+        yield from streamer
+        thread.join()
+        if errors:
+            raise errors[0]
+        timer.finish(outputs[0].shape[1] - input_ids.shape[1])
+
+    def chat(self, session_id: str, input_text: str, history: list[dict[str, str]] | None = None) -> str:
+        """
+        Генерирует ответ на реплику в рамках диалоговой сессии.
+
+        Args:
+            session_id (str): Идентификатор сессии.
+            input_text (str): Реплика пользователя
+            history (list[dict[str, str]] | None): Предыдущие сообщения беседы с ключом "content".
+        Returns:
+            str: Продолжение диалога, сгенерированное моделью
+        """
+
+        return "".join(self.stream_chat(session_id, input_text, history))
+
+    def stream_chat(self, session_id: str, input_text: str,
+                    history: list[dict[str, str]] | None = None) -> Iterator[str]:
+        """
+        Генерирует ответ на реплику в рамках диалоговой сессии и отдает его частями.
+
+        Сессия хранит кэш ключей и значений трансформера для предыдущей беседы,
+        поэтому модель обрабатывает только токены новой реплики и ответа. Кэш используется,
+        только если беседа сессии совпадает с началом history; иначе (сессия вытеснена
+        или история изменена) беседа заново обрабатывается по history, так что ответ
+        не зависит от состояния кэша. Если беседа не помещается в контекст модели,
+        отбрасывается ее начало. Сообщения разделяются TURN_SEPARATOR. Длина ответа
+        и min_length считаются от новой реплики так же, как в generate_text.
+        Декодирование выполняется токен за токеном, поэтому beam search в этом режиме
+        не используется. Если вызывающий код прекращает чтение ответа раньше его конца,
+        сессия возвращается к состоянию до реплики.
+
+        Args:
+            session_id (str): Идентификатор сессии.
+            input_text (str): Реплика пользователя
+            history (list[dict[str, str]] | None): Предыдущие сообщения беседы с ключом "content".
+            Если не задана, беседой считается то, что хранит сессия.
+        Returns:
+            Iterator[str]: Фрагменты продолжения диалога
+        """
+
+        session = self.sessions.get(session_id)
+        with session.lock:
+            yield from self._stream_turn(session, input_text, history)
+
+    def end_session(self, session_id: str) -> None:
+        """
+        Завершает диалоговую сессию и освобождает ее кэш.
+
+        Args:
+            session_id (str): Идентификатор сессии.
+
+        Returns:
+            None
+        """
+
+        self.sessions.drop(session_id)
+
+    def _encode_message(self, text: str) -> list[int]:
+        """
+        Токенизирует сообщение беседы вместе с разделителем после него.
+
+        Args:
+            text (str): Текст сообщения.
+
+        Returns:
+            list[int]: Токены сообщения и разделителя.
+        """
+
+        return self.tokenizer.encode(text) + self.tokenizer.encode(TURN_SEPARATOR)
+
+    def _sync_history(self, session: ChatSession, history: list[dict[str, str]] | None) -> None:
+        """
+        Приводит беседу сессии в соответствие с историей сообщений.
+
+        Если беседа сессии - начало истории, недостающие сообщения дописываются к ней
+        и кэш переиспользуется; иначе беседа собирается из истории заново.
+
+        Args:
+            session (ChatSession): Сессия диалога.
+            history (list[dict[str, str]] | None): Предыдущие сообщения беседы.
+
+        Returns:
+            None
+        """
+
+        if history is None:
+            return
+        texts = [message["content"] for message in history]
+        if session.texts != texts[:len(session.texts)]:
+            session.reset()
+        for text in texts[len(session.texts):]:
+            session.token_ids.extend(self._encode_message(text))
+            session.texts.append(text)
+
+    def _stream_turn(self, session: ChatSession, input_text: str,
+                     history: list[dict[str, str]] | None = None) -> Iterator[str]:
+        """
+        Выполняет одну реплику диалога, обновляя кэш сессии после каждого токена.
+
+        Args:
+            session (ChatSession): Сессия диалога.
+            input_text (str): Реплика пользователя
+            history (list[dict[str, str]] | None): Предыдущие сообщения беседы.
+        Returns:
+            Iterator[str]: Фрагменты продолжения диалога
+        """
+
+        timer = metrics.measure(self.name)
+        self._sync_history(session, history)
+        start_texts, start_ids = len(session.texts), list(session.token_ids)
+        finished = False
+        try:
+            yield from self._generate_turn(session, input_text, timer)
+            finished = True
+        finally:
+            if not finished:
+                # Ответ прочитан не до конца или генерация упала: частичный ответ не должен
+                # остаться в беседе сессии, иначе следующая реплика продолжит его
+                if session.token_ids[:len(start_ids)] == start_ids:
+                    del session.token_ids[len(start_ids):]
+                    del session.texts[start_texts:]
+                    session.crop_cache(len(start_ids))
+                else:
+                    # Начало беседы отброшено при переполнении контекста - проще собрать ее заново
+                    session.reset()
+                self.sessions.update(session)
+
+    def _generate_turn(self, session: ChatSession, input_text: str, timer) -> Iterator[str]:
+        """
+        Генерирует ответ на реплику, дописывая реплику и ответ в беседу сессии.
+
+        Args:
+            session (ChatSession): Сессия диалога, уже согласованная с историей.
+            input_text (str): Реплика пользователя
+            timer (GenerationTimer): Замер метрик реплики.
+        Returns:
+            Iterator[str]: Фрагменты продолжения диалога
+        """
+
+        turn_ids = self._encode_message(input_text)
+        timer.tokenized(len(turn_ids))
+        max_new_tokens = max(1, self.max_length - len(turn_ids))
+        session.token_ids.extend(turn_ids)
+        session.texts.append(input_text)
+
+        # Беседа не помещается в контекст: отбрасываем ее начало. Позиции токенов
+        # при этом сдвигаются, поэтому оставшаяся часть обрабатывается заново
+        limit = max(1, self.model.config.n_positions - max_new_tokens)
+        if len(session.token_ids) > limit:
+            session.token_ids = session.token_ids[-limit:]
+            session.drop_cache()
+
+        eos_token_id = self.tokenizer.eos_token_id
+        processors = LogitsProcessorList()
+        if eos_token_id is not None:
+            processors.append(MinLengthLogitsProcessor(self.min_length, eos_token_id))
+        if self.no_repeat_ngram_size:
+            processors.append(NoRepeatNGramLogitsProcessor(self.no_repeat_ngram_size))
+        if self.do_sample:
+            processors.extend([TemperatureLogitsWarper(self.temperature),
+                               TopKLogitsWarper(self.top_k),
+                               TopPLogitsWarper(self.top_p)])
+
+        # Объем кэша на один токен: ключи и значения во всех слоях
+        token_bytes = (2 * self.model.config.n_layer * self.model.config.n_embd
+                       * self.model.transformer.wte.weight.element_size())
+        generated: list[int] = []
+        text = ""
+
+        for _ in range(max_new_tokens):
+            # Через модель проходят только токены, которых еще нет в кэше
+            input_ids = session.token_ids[session.cached_tokens:]
+            with torch.inference_mode():
+                output = self.model(input_ids=torch.tensor([input_ids]),
+                                    past_key_values=session.past_key_values, use_cache=True)
+                scores = processors(torch.tensor([turn_ids + generated]), output.logits[:, -1, :])
+                if self.do_sample:
+                    token = int(torch.multinomial(torch.softmax(scores, dim=-1), num_samples=1))
+                else:
+                    token = int(scores.argmax(dim=-1))
+
+            session.past_key_values = output.past_key_values
+            session.cached_tokens = len(session.token_ids)
+            session.nbytes = session.cached_tokens * token_bytes
+            timer.first_token()
+            if token == eos_token_id:
+                break
+
+            # Токен попадет в кэш на следующем шаге или в следующей реплике
+            session.token_ids.append(token)
+            generated.append(token)
+
+            # Декодируем весь ответ, чтобы не разрывать многобайтовые символы между токенами
+            decoded = self.tokenizer.decode(generated, skip_special_tokens=True)
+            if len(decoded) > len(text) and not decoded.endswith("\ufffd"):
+                yield decoded[len(text):]
+                text = decoded
+
+        decoded = self.tokenizer.decode(generated, skip_special_tokens=True)
+        if len(decoded) > len(text):
+            yield decoded[len(text):]
+
+        # Ответ целиком, как его соберет вызывающий код, чтобы следующая история совпала с сессией.
+        # Токены ответа заменяются токенизацией его текста с разделителем - той же, что получится
+        # при сборке беседы из истории, - а кэш обрезается до места, где они расходятся
+        session.texts.append(decoded)
+        reply_ids = self._encode_message(decoded)
+        if reply_ids != generated:
+            start = len(session.token_ids) - len(generated)
+            common = 0
+            while common < min(len(generated), len(reply_ids)) and generated[common] == reply_ids[common]:
+                common += 1
+            session.token_ids[start:] = reply_ids
+            session.crop_cache(start + common)
+        self.sessions.update(session)
+        timer.finish(len(generated))
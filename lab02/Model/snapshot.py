@@ -0,0 +1,64 @@
+"""
+Модуль для загрузки модели RuGPT3 из локального снимка весов.
+
+Снимки создаются и загружаются средствами textgen_common.snapshot; здесь задан
+каталог снимков лабораторной и запасная загрузка через from_pretrained.
+
+Создание снимка:
+    python -m Model.snapshot --config ./Model/config.yaml
+"""
+import argparse
+import os
+
+import yaml
+from textgen_common.snapshot import create_snapshot, find_snapshot, snapshot_path
+from transformers import GPT2LMHeadModel, GPT2Tokenizer
+
+SNAPSHOT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "snapshots")
+
+
+def load_pretrained(model_path: str, tokenizer_path: str,
+                    snapshot_root: str = SNAPSHOT_ROOT) -> tuple[GPT2LMHeadModel, GPT2Tokenizer]:
+    """
+    Загружает модель и токенизатор из снимка, если он есть, иначе через from_pretrained.
+
+    Args:
+        model_path (str): Путь или имя модели.
+        tokenizer_path (str): Путь или имя токенизатора.
+        snapshot_root (str): Корневой каталог снимков.
+
+    Returns:
+        tuple[GPT2LMHeadModel, GPT2Tokenizer]: Модель и токенизатор.
+    """
+    snapshot = find_snapshot(model_path, snapshot_root, GPT2Tokenizer)
+    if snapshot is not None:
+        return snapshot
+    model = GPT2LMHeadModel.from_pretrained(model_path)
+    model.eval()
+    return model, GPT2Tokenizer.from_pretrained(tokenizer_path)
+
+
+def main():
+    """
+    Точка входа: создает снимок модели из конфигурационного файла или по имени.
+    """
+    parser = argparse.ArgumentParser(description="Создание локального снимка модели в safetensors")
+    parser.add_argument("--config", default="./Model/config.yaml", help="конфигурационный файл RuGPT3")
+    parser.add_argument("--model", default=None, help="имя модели, если не задано - берется из конфигурации")
+    parser.add_argument("--snapshot-root", default=SNAPSHOT_ROOT)
+    args = parser.parse_args()
+
+    if args.model:
+        model_path = tokenizer_path = args.model
+    else:
+        with open(args.config, "r", encoding="utf-8") as file:
+            config = yaml.safe_load(file)
+        model_path = config["model"]["model_path"]
+        tokenizer_path = config["model"]["tokenizer_path"]
+
+    output_dir = create_snapshot(model_path, tokenizer_path, snapshot_path(model_path, args.snapshot_root))
+    print(f"Снимок сохранен в {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,19 +2,94 @@
 Модуль предназначен для тестирования RuGPT, позволяя варьировать различные параметры
 генерации текста и применять различные промты.
 """
+import itertools
 import json
+import os
+import random
+import sys
 
-from transformers import GPT2LMHeadModel, GPT2Tokenizer, PreTrainedModel
+import yaml
+from transformers import GPT2Tokenizer, PreTrainedModel
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Model.snapshot import load_pretrained  # pylint: disable=import-error, wrong-import-position
 
-def create_parameter_combinations() -> list[dict[str, str | int | bool]]:
+SWEEP_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sweep.yaml")
+MODEL_NAME = "sberbank-ai/rugpt3small_based_on_gpt2"
+PROMPTS = [
+    "Системы обнаружения мошенничества с кредитными картами приобретают все большее значение",
+    "Чтобы защититься от кражи банковских карт",
+    "Банковские карты имеют широкий спектр применения в различных областях"]
+
+
+def load_sweep_config(config_path: str = SWEEP_CONFIG) -> dict:
+    """
+    Загружает описание сетки параметров из YAML-файла.
+
+    Args:
+        config_path (str): Путь к файлу сетки. По умолчанию используется "sweep.yaml"
+        рядом с модулем.
+
+    Returns:
+        dict: Содержимое конфигурационного файла.
+    """
+    with open(config_path, "r", encoding="utf-8") as file:
+        return yaml.safe_load(file)
+
+
+def _cartesian(values: dict[str, list]) -> list[dict]:
+    """
+    Возвращает все сочетания значений словаря списков.
+
+    Args:
+        values (dict[str, list]): Имя параметра -> список значений.
+
+    Returns:
+        list[dict]: Список словарей со всеми сочетаниями.
+    """
+    for name, options in values.items():
+        if not isinstance(options, list):
+            raise ValueError(f"В режиме cartesian параметр {name} должен быть списком значений")
+    return [dict(zip(values, combination)) for combination in itertools.product(*values.values())]
+
+
+def _sample(values: dict[str, list | dict], rng: random.Random) -> dict:
+    """
+    Выбирает случайное значение для каждого параметра.
+
+    Args:
+        values (dict[str, list | dict]): Имя параметра -> список значений или диапазон {min, max}.
+        rng (random.Random): Генератор случайных чисел.
+
+    Returns:
+        dict: Одно случайное сочетание параметров.
+    """
+    result = {}
+    for name, options in values.items():
+        if isinstance(options, dict):
+            low, high = options["min"], options["max"]
+            if isinstance(low, int) and isinstance(high, int):
+                result[name] = rng.randint(low, high)
+            else:
+                result[name] = round(rng.uniform(low, high), 3)
+        else:
+            result[name] = rng.choice(options)
+    return result
+
+
+def create_parameter_combinations(config_path: str = SWEEP_CONFIG) -> list[dict[str, str | int | bool]]:
     """
     Создает список комбинаций параметров для генерации текста с использованием языковой модели.
 
-    Функция генерирует различные комбинации параметров генерации, учитывая вариации
-    максимальной длины текста, режима выборки (sampling), и температуры.
-    Если выборка включена (`do_sample=True`), то также используются параметры `temperature`,
-    `top_k` и `top_p`. Для выборки `do_sample=False` эти параметры игнорируются.
+    Сетка описывается в YAML-файле (см. "sweep.yaml"): раздел `grid` задает общие параметры,
+    `sampling` - параметры выборки, которые используются только при `do_sample=True`,
+    а `fixed` - параметры, одинаковые для всех комбинаций. В режиме `cartesian`
+    перебираются все сочетания, в режиме `random` выбирается `samples` различных
+    случайных сочетаний.
+
+    Args:
+        config_path (str): Путь к файлу сетки. По умолчанию используется "sweep.yaml"
+        рядом с модулем.
 
     Returns:
         list[dict[str, str | int | bool]]: Список словарей, где
@@ -29,48 +104,87 @@ def create_parameter_combinations() -> list[dict[str, str | int | bool]]:
         - "no_repeat_ngram_size" (int): Размер n-грамм для предотвращения повторений.
         - "top_k" (int): Параметр для top-k sampling (используется, если `do_sample=True`).
         - "top_p" (float): Параметр для top-p sampling (используется, если `do_sample=True`).
-    """
-    max_length = [100, 150, 200]
-    temperature = [0.8, 1.3, 2.0]
-    do_sample = [True, False]
-    num_beams = 3
-    num_return_sequences = 1
-    no_repeat_ngram_size = 2
-    top_k = 20
-    top_p = 0.8
 
-    result = []
+    Raises:
+        ValueError: Если в файле указан неизвестный режим `mode`.
+    """
+    config = load_sweep_config(config_path)
+    grid = config.get("grid", {})
+    sampling = config.get("sampling", {})
+    fixed = config.get("fixed", {})
+    mode = config.get("mode", "cartesian")
+    if mode not in ("cartesian", "random"):
+        raise ValueError(f"Неизвестный режим перебора: {mode!r}, ожидается 'cartesian' или 'random'")
 
-    for ml in max_length:
-        for sample in do_sample:
-            if sample:
+    if mode == "cartesian":
+        result = []
+        for params in _cartesian(grid):
+            if params.get("do_sample"):
                 # Если do_sample=True, то используем temperature, top_k и top_p
-                for temp in temperature:
-                    param_dict = {
-                        "max_length": ml,
-                        "temperature": temp,
-                        "do_sample": sample,
-                        "num_beams": num_beams,
-                        "num_return_sequences": num_return_sequences,
-                        "no_repeat_ngram_size": no_repeat_ngram_size,
-                        "top_k": top_k,
-                        "top_p": top_p
-                    }
-                    result.append(param_dict)
+                result.extend({**params, **extra, **fixed} for extra in _cartesian(sampling))
             else:
                 # Если do_sample=False, то игнорируем temperature, top_k и top_p
-                param_dict = {
-                    "max_length": ml,
-                    "do_sample": sample,
-                    "num_beams": num_beams,
-                    "num_return_sequences": num_return_sequences,
-                    "no_repeat_ngram_size": no_repeat_ngram_size
-                }
-                result.append(param_dict)
+                result.append({**params, **fixed})
+        return result
 
+    rng = random.Random(config.get("seed"))
+    result, seen = [], set()
+    # Ограничение попыток на случай, если различных сочетаний меньше, чем samples
+    for _ in range(config.get("samples", 20) * 100):
+        if len(result) == config.get("samples", 20):
+            break
+        params = _sample(grid, rng)
+        if params.get("do_sample"):
+            params.update(_sample(sampling, rng))
+        params.update(fixed)
+        key = json.dumps(params, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            result.append(params)
     return result
 
 
+def estimate_cost(params: dict[str, str | int | bool]) -> int:
+    """
+    Оценивает стоимость генерации для комбинации параметров.
+
+    Args:
+        params (dict[str, str | int | bool]): Параметры генерации.
+
+    Returns:
+        int: Условная стоимость max_length * num_beams * num_return_sequences.
+    """
+    return params["max_length"] * params.get("num_beams", 1) * params.get("num_return_sequences", 1)
+
+
+def schedule_combinations(params_list: list[dict[str, str | int | bool]]) -> list[dict[str, str | int | bool]]:
+    """
+    Упорядочивает комбинации по возрастанию оценки стоимости,
+    чтобы дешевые конфигурации завершались первыми.
+
+    Args:
+        params_list (list[dict[str, str | int | bool]]): Комбинации параметров.
+
+    Returns:
+        list[dict[str, str | int | bool]]: Те же комбинации, отсортированные по стоимости.
+    """
+    return sorted(params_list, key=estimate_cost)
+
+
+def batch_size_for(params: dict[str, str | int | bool], token_budget: int) -> int:
+    """
+    Подбирает размер пакета так, чтобы пакет укладывался в бюджет токенов.
+
+    Args:
+        params (dict[str, str | int | bool]): Параметры генерации.
+        token_budget (int): Максимальная суммарная стоимость пакета.
+
+    Returns:
+        int: Количество промтов в одном пакете (не меньше 1).
+    """
+    return max(1, token_budget // estimate_cost(params))
+
+
 def save_results_to_json(results, file_name:str ="results.json") -> None:
     """
        Сохраняет результаты генерации текста в JSON-файл.
@@ -128,19 +242,83 @@ def generate_text_from_params(params:dict[str, str | int | bool], model:PreTrain
     return tokenizer.decode(output[0], skip_special_tokens=True)
 
 
+def generate_batch_from_params(params: dict[str, str | int | bool], model: PreTrainedModel,
+                               tokenizer: GPT2Tokenizer, prompts: list[str],
+                               batch_size: int = 16) -> list[str]:
+    """
+    Генерирует тексты для нескольких промтов с одинаковыми параметрами генерации
+    пакетами по batch_size промтов за один вызов `model.generate`.
+
+    Промты выравниваются паддингом слева. Чтобы каждый промт получил ту же
+    `max_length`, что и при генерации по одному, длина пакета увеличивается на
+    размер паддинга, а лишние токены каждой строки отбрасываются. Результат не
+    обязательно совпадает с generate_text_from_params: при num_beams > 1 нормировка
+    длины лучей и запрет повторов n-грамм учитывают паддинг, и выбранный луч может
+    отличаться. Настройки токенизатора после вызова восстанавливаются.
+
+    Args:
+        params (dict[str, str | int | bool]): Словарь с параметрами генерации текста.
+        model (PreTrainedModel): Предварительно обученная модель.
+        tokenizer (GPT2Tokenizer): Токенизатор модели.
+        prompts (list[str]): Список промтов.
+        batch_size (int): Максимальное количество промтов в одном пакете.
+
+    Returns:
+        list[str]: Сгенерированные тексты в том же порядке, что и промты.
+    """
+    generation_params = {
+        "max_length": params["max_length"],
+        "do_sample": params["do_sample"],
+        "num_beams": params["num_beams"],
+        "num_return_sequences": params["num_return_sequences"],
+        "no_repeat_ngram_size": params["no_repeat_ngram_size"],
+    }
+    if params.get("do_sample"):
+        generation_params.update(temperature=params.get("temperature"),
+                                 top_k=params.get("top_k"),
+                                 top_p=params.get("top_p"))
+
+    # Токенизатор общий с остальным кодом, поэтому его настройки меняются только на время вызова
+    padding_side, pad_token = tokenizer.padding_side, tokenizer.pad_token
+    tokenizer.padding_side = "left"
+    if pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+
+    results = []
+    try:
+        for start in range(0, len(prompts), batch_size):
+            inputs = tokenizer(prompts[start:start + batch_size], return_tensors="pt", padding=True)
+            padding = (inputs.attention_mask == 0).sum(dim=1)
+            extra = int(padding.max())
+
+            output = model.generate(inputs.input_ids,
+                                    attention_mask=inputs.attention_mask,
+                                    pad_token_id=tokenizer.pad_token_id,
+                                    **{**generation_params,
+                                       "max_length": generation_params["max_length"] + extra})
+
+            # Из каждой группы num_return_sequences берется первая последовательность, как в
+            # generate_text_from_params, и обрезается до max_length собственных токенов промта
+            for row, pad in enumerate(padding.tolist()):
+                sequence = output[row * params["num_return_sequences"]]
+                sequence = sequence[pad:pad + params["max_length"]]
+                results.append(tokenizer.decode(sequence, skip_special_tokens=True))
+    finally:
+        tokenizer.padding_side = padding_side
+        tokenizer.pad_token = pad_token
+
+    return results
+
+
 def main():
     """
     Основная функция для генерации текстов с использованием модели GPT-3
     и различных комбинаций параметров.
     """
-    params_list = create_parameter_combinations()
-    model_name = "sberbank-ai/rugpt3small_based_on_gpt2"
-    model = GPT2LMHeadModel.from_pretrained(model_name)
-    tokenizer = GPT2Tokenizer.from_pretrained(model_name)
-    prompts = [
-        "Системы обнаружения мошенничества с кредитными картами приобретают все большее значение",
-        "Чтобы защититься от кражи банковских карт",
-        "Банковские карты имеют широкий спектр применения в различных областях"]
+    params_list = schedule_combinations(create_parameter_combinations())
+    token_budget = load_sweep_config().get("token_budget", 4800)
+    model, tokenizer = load_pretrained(MODEL_NAME, MODEL_NAME)
+    prompts = PROMPTS
 
     results = []
     count = 0
@@ -148,10 +326,12 @@ def main():
         tmp = {
             "Параметры": params
         }
+        # Все промты с одинаковыми параметрами генерируются одним пакетом
+        generated_texts = generate_batch_from_params(params=params, prompts=prompts,
+                                                     model=model, tokenizer=tokenizer,
+                                                     batch_size=batch_size_for(params, token_budget))
         details_list = []
-        for prompt in prompts:
-            generated_text = generate_text_from_params(params=params, prompt=prompt,
-                                                       model=model, tokenizer=tokenizer)
+        for prompt, generated_text in zip(prompts, generated_texts):
             detail = {
                 "Текст": prompt,
                 "Ответ": generated_text.replace("\xa0", " ")
@@ -0,0 +1,151 @@
+"""
+Модуль сравнивает обычный (fp32) и оптимизированный для CPU (int8) режимы RuGPT
+по времени генерации, памяти процесса и качеству предсказаний.
+
+Каждый режим измеряется в отдельном процессе, чтобы RSS не смешивался.
+Отчет сохраняется в markdown-файл.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from Model.optimization import configure_threads, quantize_dynamic_int8  # pylint: disable=import-error, wrong-import-position
+from Model.snapshot import load_pretrained  # pylint: disable=import-error, wrong-import-position
+from main import MODEL_NAME, PROMPTS  # pylint: disable=import-error, wrong-import-position
+
+REFERENCE_TEXTS = PROMPTS + [
+    "Для оплаты покупок в интернете рекомендуется использовать отдельную виртуальную карту.",
+    "Банк может заблокировать карту, если заметит подозрительные операции по счету.",
+]
+
+
+def rss_mb(field: str = "VmRSS") -> float:
+    """
+    Возвращает RSS процесса в мегабайтах.
+
+    Args:
+        field (str): Поле /proc/self/status: "VmRSS" - текущий RSS, "VmHWM" - пиковый за время жизни процесса.
+
+    Returns:
+        float: Размер резидентной памяти процесса.
+    """
+    with open("/proc/self/status", "r", encoding="utf-8") as file:
+        for line in file:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def measure(model_name: str, quantize: bool, num_threads: int, new_tokens: int, repeats: int) -> dict:
+    """
+    Загружает модель в заданном режиме и измеряет ее характеристики.
+
+    Args:
+        model_name (str): Имя или путь модели.
+        quantize (bool): Применять ли динамическое int8-квантование.
+        num_threads (int): Количество intra-op потоков torch.
+        new_tokens (int): Количество генерируемых токенов на промт.
+        repeats (int): Количество повторов генерации для каждого промта.
+
+    Returns:
+        dict: Время загрузки, RSS, задержки генерации, перплексия и предсказанные токены.
+    """
+    configure_threads(num_threads)
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    model, tokenizer = load_pretrained(model_name, model_name)
+    if quantize:
+        model = quantize_dynamic_int8(model)
+    load_time = time.perf_counter() - start
+    rss_model = rss_mb() - rss_before
+
+    latencies = []
+    with torch.inference_mode():
+        for prompt in PROMPTS:
+            input_ids = tokenizer.encode(prompt, return_tensors="pt")
+            for _ in range(repeats):
+                start = time.perf_counter()
+                model.generate(input_ids, max_new_tokens=new_tokens, min_new_tokens=new_tokens,
+                               do_sample=False, num_beams=1, pad_token_id=tokenizer.eos_token_id)
+                latencies.append(time.perf_counter() - start)
+
+        losses, predictions = [], []
+        for text in REFERENCE_TEXTS:
+            input_ids = tokenizer.encode(text, return_tensors="pt")
+            output = model(input_ids, labels=input_ids)
+            losses.append(output.loss.item())
+            predictions.append(output.logits[0].argmax(dim=-1).tolist())
+
+    return {
+        "load_time": load_time,
+        "rss_model": rss_model,
+        "rss_peak": rss_mb("VmHWM"),
+        "latency_mean": statistics.mean(latencies),
+        "latency_p95": sorted(latencies)[int(len(latencies) * 0.95)],
+        "tokens_per_second": new_tokens / statistics.mean(latencies),
+        "perplexity": float(torch.exp(torch.tensor(statistics.mean(losses)))),
+        "predictions": predictions,
+    }
+
+
+def main():
+    """
+    Точка входа: измеряет оба режима и сохраняет сравнительный отчет.
+    """
+    parser = argparse.ArgumentParser(description="Сравнение fp32 и int8 режимов RuGPT на CPU")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--threads", type=int, default=0, help="потоков torch, 0 - по умолчанию")
+    parser.add_argument("--new-tokens", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default="quantization_report.md")
+    args = parser.parse_args()
+
+    results = {}
+    for name, quantize in (("fp32", False), ("int8", True)):
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            results[name] = executor.submit(measure, args.model, quantize, args.threads,
+                                            args.new_tokens, args.repeats).result()
+
+    # Доля позиций, в которых int8-модель предсказывает тот же следующий токен, что и fp32
+    same = total = 0
+    for fp32, int8 in zip(results["fp32"]["predictions"], results["int8"]["predictions"]):
+        same += sum(a == b for a, b in zip(fp32, int8))
+        total += len(fp32)
+
+    rows = [
+        ("Загрузка, с", "load_time", "{:.2f}"),
+        ("RSS модели, МБ", "rss_model", "{:.0f}"),
+        ("Пиковый RSS, МБ", "rss_peak", "{:.0f}"),
+        ("Задержка генерации (среднее), с", "latency_mean", "{:.3f}"),
+        ("Задержка генерации (p95), с", "latency_p95", "{:.3f}"),
+        ("Токенов в секунду", "tokens_per_second", "{:.1f}"),
+        ("Перплексия на эталонных текстах", "perplexity", "{:.2f}"),
+    ]
+    lines = [
+        f"# Сравнение режимов RuGPT на CPU: {args.model}",
+        "",
+        f"Потоков torch: {args.threads or torch.get_num_threads()}, "
+        f"токенов на генерацию: {args.new_tokens}, повторов: {args.repeats}",
+        "",
+        "| Метрика | fp32 | int8 |",
+        "|---|---|---|",
+    ]
+    for title, key, fmt in rows:
+        lines.append(f"| {title} | {fmt.format(results['fp32'][key])} | {fmt.format(results['int8'][key])} |")
+    lines.append(f"| Совпадение top-1 токена с fp32 | 100% | {same / total:.1%} |")
+
+    report = "\n".join(lines) + "\n"
+    with open(args.output, "w", encoding="utf-8") as file:
+        file.write(report)
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Модуль для параллельного перебора параметров генерации RuGPT на нескольких процессах.
+
+Каждый процесс-воркер загружает модель и ограничивает число потоков torch. Если для модели
+создан локальный снимок (python -m Model.snapshot), воркеры отображают один и тот же файл
+весов в память и разделяют его страницы вместо хранения собственных копий. Результаты дописываются в JSONL-файл по мере готовности, поэтому прерванный
+перебор можно продолжить: уже посчитанные комбинации параметров пропускаются.
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+import torch
+
+from main import (MODEL_NAME, PROMPTS, SWEEP_CONFIG, batch_size_for,  # pylint: disable=import-error
+                  create_parameter_combinations, generate_batch_from_params,
+                  load_sweep_config, save_results_to_json, schedule_combinations)
+from Model.snapshot import load_pretrained  # pylint: disable=import-error, wrong-import-order
+
+_model = None
+_tokenizer = None
+
+
+def init_worker(model_name: str, threads: int) -> None:
+    """
+    Инициализирует процесс-воркер: задает число потоков torch и загружает модель.
+
+    Args:
+        model_name (str): Имя или путь модели.
+        threads (int): Количество intra-op потоков torch для этого процесса.
+
+    Returns:
+        None
+    """
+    global _model, _tokenizer  # pylint: disable=global-statement
+    torch.set_num_threads(threads)
+    _model, _tokenizer = load_pretrained(model_name, model_name)
+
+
+def run_combination(params: dict[str, str | int | bool], prompts: list[str], batch_size: int) -> dict:
+    """
+    Генерирует ответы на все промты для одной комбинации параметров.
+
+    Args:
+        params (dict[str, str | int | bool]): Параметры генерации.
+        prompts (list[str]): Список промтов.
+        batch_size (int): Количество промтов в одном пакете generate.
+
+    Returns:
+        dict: Запись в формате generated_texts.json с ключами "Параметры" и "Детали".
+    """
+    generated_texts = generate_batch_from_params(params=params, prompts=prompts,
+                                                 model=_model, tokenizer=_tokenizer,
+                                                 batch_size=batch_size)
+    return {
+        "Параметры": params,
+        "Детали": [
+            {"Текст": prompt, "Ответ": text.replace("\xa0", " ")}
+            for prompt, text in zip(prompts, generated_texts)
+        ],
+    }
+
+
+def params_key(params: dict[str, str | int | bool]) -> str:
+    """
+    Возвращает ключ комбинации параметров, не зависящий от порядка ключей.
+
+    Args:
+        params (dict[str, str | int | bool]): Параметры генерации.
+
+    Returns:
+        str: Строковый ключ комбинации.
+    """
+    return json.dumps(params, sort_keys=True)
+
+
+def load_finished(path: str) -> dict[str, dict]:
+    """
+    Загружает уже посчитанные записи из JSONL-файла.
+
+    Оборванная при прерывании последняя строка пропускается.
+
+    Args:
+        path (str): Путь к JSONL-файлу с результатами.
+
+    Returns:
+        dict[str, dict]: Записи по ключу комбинации параметров.
+    """
+    finished = {}
+    if not os.path.exists(path):
+        return finished
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            finished[params_key(record["Параметры"])] = record
+    return finished
+
+
+def run_sweep(params_list: list[dict[str, str | int | bool]], prompts: list[str],
+              output: str = "generated_texts.jsonl", model_name: str = MODEL_NAME,
+              workers: int = 2, threads: int | None = None, token_budget: int = 4800) -> list[dict]:
+    """
+    Распределяет комбинации параметров по пулу процессов и сохраняет результаты по мере готовности.
+
+    Args:
+        params_list (list[dict[str, str | int | bool]]): Комбинации параметров генерации.
+        prompts (list[str]): Список промтов.
+        output (str): JSONL-файл для потоковой записи результатов.
+        model_name (str): Имя или путь модели.
+        workers (int): Количество процессов-воркеров.
+        threads (int | None): Потоков torch на воркер. По умолчанию ядра делятся поровну.
+        token_budget (int): Бюджет токенов на один пакет generate.
+
+    Returns:
+        list[dict]: Результаты успешно выполненных комбинаций в порядке params_list.
+    """
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+    finished = load_finished(output)
+    # Дешевые комбинации отправляются первыми и первыми попадают в результаты
+    pending = schedule_combinations([params for params in params_list if params_key(params) not in finished])
+    print(f"Готово {len(finished)}, осталось {len(pending)} из {len(params_list)}")
+
+    if pending:
+        # spawn вместо fork: дочерний процесс не наследует пулы потоков torch родителя
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"),
+                                 initializer=init_worker, initargs=(model_name, threads)) as executor, \
+                open(output, "a", encoding="utf-8") as file:
+            futures = {executor.submit(run_combination, params, prompts, batch_size_for(params, token_budget)): params
+                       for params in pending}
+            try:
+                for count, future in enumerate(as_completed(futures), start=1):
+                    try:
+                        record = future.result()
+                    except Exception as e:  # pylint: disable=broad-exception-caught
+                        # Комбинация будет запущена повторно при следующем запуске
+                        print(f"Ошибка комбинации {futures[future]}: {e}")
+                        continue
+                    file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    file.flush()
+                    os.fsync(file.fileno())
+                    finished[params_key(record["Параметры"])] = record
+                    print(f"Готов {count} из {len(pending)}")
+            except BaseException:
+                # Без отмены выход из with дождался бы всех оставшихся комбинаций впустую
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    return [finished[params_key(params)] for params in params_list if params_key(params) in finished]
+
+
+def main():
+    """
+    Точка входа: параллельный перебор параметров с сохранением в generated_texts.json.
+    """
+    parser = argparse.ArgumentParser(description="Параллельный перебор параметров генерации RuGPT")
+    parser.add_argument("--workers", type=int, default=2, help="количество процессов")
+    parser.add_argument("--threads", type=int, default=None, help="потоков torch на процесс")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--output", default="generated_texts.jsonl")
+    parser.add_argument("--config", default=SWEEP_CONFIG, help="файл сетки параметров")
+    args = parser.parse_args()
+
+    results = run_sweep(create_parameter_combinations(args.config), PROMPTS, output=args.output,
+                        model_name=args.model, workers=args.workers, threads=args.threads,
+                        token_budget=load_sweep_config(args.config).get("token_budget", 4800))
+    save_results_to_json(results, file_name="generated_texts.json")
+
+
+if __name__ == '__main__':
+    main()
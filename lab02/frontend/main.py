@@ -3,12 +3,36 @@
 """
 import os
 import sys
+import uuid
 
 import streamlit as st
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from Model.ru_gpt3 import RuGPT3 # pylint: disable=import-error, wrong-import-position
-from ChatLogger.chat_logger import ChatLogger # pylint: disable=import-error, wrong-import-position
+from ChatLogger.chat_logger import ChatLogger, StreamingChatLogger # pylint: disable=import-error, wrong-import-position
+
+
+@st.cache_resource
+def load_model() -> RuGPT3:
+    """
+    Создает экземпляр RuGPT3 один раз на процесс и переиспользует его
+    во всех перезапусках скрипта и сессиях Streamlit.
+
+    Returns:
+        RuGPT3: Общий экземпляр модели.
+    """
+    return RuGPT3()
+
+
+@st.cache_resource
+def load_stream_logger() -> StreamingChatLogger:
+    """
+    Создает общий для всех сессий потоковый логгер сообщений.
+
+    Returns:
+        StreamingChatLogger: Общий экземпляр логгера.
+    """
+    return StreamingChatLogger()
 
 
 def main():
@@ -20,8 +44,9 @@ def main():
 
     Взаимодействие с пользователем происходит через интерфейс Streamlit.
     """
-    gpt = RuGPT3()
+    gpt = load_model()
     logger = ChatLogger()
+    stream_logger = load_stream_logger()
 
     st.header(f'Чат с {gpt.name}')
 
@@ -47,6 +72,8 @@ def main():
 
     if "messages" not in st.session_state:
         st.session_state.messages = []
+    # Идентификатор диалога, под которым модель хранит кэш уже обработанной беседы
+    st.session_state.setdefault("session_id", uuid.uuid4().hex)
 
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
@@ -56,12 +83,16 @@ def main():
         with st.chat_message("user"):
             st.markdown(prompt)
         st.session_state.messages.append({"role": "user", "content": prompt})
+        stream_logger.log(st.session_state.session_id, "user", prompt)
 
         with st.chat_message("assistant"):
-            response = gpt.generate_text(prompt)
-            st.markdown(response)
+            # Ответ выводится по мере генерации токенов; прошлые реплики берутся из кэша сессии,
+            # а если он вытеснен - обрабатываются заново по истории сообщений
+            response = st.write_stream(gpt.stream_chat(st.session_state.session_id, prompt,
+                                                       st.session_state.messages[:-1]))
 
         st.session_state.messages.append({"role": "assistant", "content": response})
+        stream_logger.log(st.session_state.session_id, "assistant", response)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,11 @@
 """Модуль для работы с моделями (например, GPT, Llama)"""
 import json
 
-from transformers import AutoTokenizer, LlamaForCausalLM, AutoModelForCausalLM
+import torch
+from textgen_common.metrics import metrics
+from transformers import AutoTokenizer, LlamaForCausalLM, AutoModelForCausalLM, LogitsProcessorList
+
+from Models.snapshot import load_pretrained
 
 
 class BaseModel:
@@ -12,12 +16,24 @@ class BaseModel:
             config_file (str): Путь к конфигурационному файлу для загрузки параметров модели (по умолчанию "./Models/model_params.json")."""
         self.model_name = model_name
 
-        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-
-        if "Llama" in model_name.lower():
-            self.model = LlamaForCausalLM.from_pretrained(self.model_name, device_map="sequential")
+        # Локальный снимок (python -m Models.snapshot) отображается в память без копирования весов
+        snapshot = load_pretrained(self.model_name)
+        if snapshot is not None:
+            self.model, self.tokenizer = snapshot
+            if torch.cuda.is_available():
+                self.model.to("cuda")
         else:
-            self.model = AutoModelForCausalLM.from_pretrained(self.model_name, device_map="sequential")
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+
+            if "Llama" in model_name.lower():
+                self.model = LlamaForCausalLM.from_pretrained(self.model_name, device_map="sequential")
+            else:
+                self.model = AutoModelForCausalLM.from_pretrained(self.model_name, device_map="sequential")
+
+        # Левое дополнение нужно для пакетной генерации декодерными моделями
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
 
         self.model_params = self.load_model_params(config_file)
 
@@ -50,12 +66,42 @@ class BaseModel:
 
         Returns:
             str: Сгенерированный ответ, который декодируется из тензора в текст."""
+        timer = metrics.measure(self.model_name)
         inputs = self.tokenizer(prompt, return_tensors="pt", padding=True, truncation=True)
+        timer.tokenized(inputs.input_ids.shape[1])
 
         generate_ids = self.model.generate(
             inputs.input_ids,
+            logits_processor=LogitsProcessorList([timer]),
             **self.model_params
         )
+        timer.finish(generate_ids.shape[1] - inputs.input_ids.shape[1])
 
         output = self.tokenizer.batch_decode(generate_ids, skip_special_tokens=True)[0]
         return output
+
+    def generate_batch(self, prompts: list[str]) -> list[str]:
+        """
+        Генерация ответов на несколько промтов одним вызовом generate.
+        Промты дополняются слева до общей длины, дополнение исключается маской внимания.
+        Args:
+            prompts (list[str]): Текстовые подсказки.
+
+        Returns:
+            list[str]: Сгенерированные ответы в порядке промтов."""
+        timer = metrics.measure(self.model_name)
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True, truncation=True)
+        timer.tokenized(int(inputs.attention_mask.sum()))
+
+        generate_ids = self.model.generate(
+            inputs.input_ids,
+            attention_mask=inputs.attention_mask,
+            pad_token_id=self.tokenizer.pad_token_id,
+            logits_processor=LogitsProcessorList([timer]),
+            **self.model_params
+        )
+        # Строки, завершившиеся раньше остальных, дополнены pad-токенами - их не считаем
+        generated = generate_ids[:, inputs.input_ids.shape[1]:]
+        timer.finish(int((generated != self.tokenizer.pad_token_id).sum()))
+
+        return self.tokenizer.batch_decode(generate_ids, skip_special_tokens=True)
@@ -0,0 +1,108 @@
+"""
+Модуль для объединения одновременных запросов к модели в пакеты.
+
+Запросы разных пользователей попадают в асинхронную очередь модели; сборщик
+ждет короткое окно, забирает до max_batch_size промтов и выполняет их одним
+вызовом generate с левым дополнением, после чего раздает ответы ожидающим
+обработчикам через их future.
+"""
+import asyncio
+from collections.abc import Awaitable, Callable
+
+from Models.BaseModel import BaseModel
+
+
+class MicroBatcher:
+    """
+    Асинхронная очередь запросов к одной модели с пакетной генерацией.
+    """
+
+    def __init__(self, model: BaseModel, run: Callable[..., Awaitable[list[str]]],
+                 max_batch_size: int = 8, window: float = 0.05) -> None:
+        """
+        Создает очередь; сборщик запускается при первом запросе.
+
+        Args:
+            model (BaseModel): Модель для генерации.
+            run (Callable[..., Awaitable[list[str]]]): Корутина, выполняющая блокирующую функцию
+                вне цикла событий: run(function, *args).
+            max_batch_size (int): Максимальное количество промтов в одном вызове generate.
+            window (float): Время сбора пакета в секундах.
+        """
+        self.model = model
+        self.run = run
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self._queue: asyncio.Queue[tuple[str, asyncio.Future]] | None = None
+        self._task: asyncio.Task | None = None
+        # Future пакета, который генерируется прямо сейчас
+        self._in_flight: list[asyncio.Future] = []
+
+    def submit(self, prompt: str) -> asyncio.Future:
+        """
+        Ставит промт в очередь.
+
+        Args:
+            prompt (str): Текстовая подсказка.
+
+        Returns:
+            asyncio.Future: Future с ответом модели. Отмененные future пропускаются при сборке пакета.
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._collect())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((prompt, future))
+        return future
+
+    async def _collect(self) -> None:
+        """
+        Собирает пакеты из очереди и выполняет их по одному.
+
+        Пока пакет генерируется, новые запросы копятся в очереди и уходят следующим пакетом.
+        """
+        while True:
+            batch = [await self._queue.get()]
+            if self.window > 0 and self._queue.qsize() + 1 < self.max_batch_size:
+                await asyncio.sleep(self.window)
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # Запросы, чей обработчик уже не ждет ответа (таймаут), не генерируются
+            batch = [(prompt, future) for prompt, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            self._in_flight = [future for _, future in batch]
+            try:
+                results = await self.run(self.model.generate_batch, [prompt for prompt, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self._in_flight = []
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def close(self) -> None:
+        """
+        Останавливает сборщик и завершает ожидающие запросы ошибкой.
+
+        Ошибку получают и запросы генерируемого сейчас пакета, и запросы в очереди,
+        поэтому их обработчики сразу переходят к статическому тексту, не дожидаясь таймаута.
+        """
+        futures, self._in_flight = self._in_flight, []
+        while self._queue is not None and not self._queue.empty():
+            futures.append(self._queue.get_nowait()[1])
+        error = RuntimeError(f"Модель {self.model.model_name} выгружена")
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,145 @@
+"""
+Модуль для выполнения генерации вне цикла событий бота.
+
+Генерация текста блокирует поток на секунды, поэтому она выполняется в отдельном
+пуле потоков с ограниченным числом воркеров, а обработчики aiogram только ожидают
+результат с таймаутом и продолжают обслуживать других пользователей.
+При max_batch_size > 1 одновременные запросы к одной модели объединяются в пакеты.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from Models.BaseModel import BaseModel
+from Models.batching import MicroBatcher
+
+
+class GenerationExecutor:
+    """
+    Пул потоков для генерации ответов моделью с таймаутом на один запрос.
+    """
+
+    def __init__(self, max_workers: int = 1, timeout: float = 30.0,
+                 max_batch_size: int = 1, batch_window: float = 0.05) -> None:
+        """
+        Создает пул генерации.
+
+        Args:
+            max_workers (int): Максимальное количество одновременных генераций.
+            timeout (float): Таймаут ожидания одного ответа в секундах.
+            max_batch_size (int): Максимальный размер пакета; 1 - без объединения запросов.
+            batch_window (float): Время сбора пакета в секундах.
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self._pool: ThreadPoolExecutor | None = None
+        self._batchers: dict[BaseModel, MicroBatcher] = {}
+        # Количество ожидающих ответа запросов пользователей
+        self.active = 0
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        """Пул потоков, создается при первом обращении."""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="generation")
+        return self._pool
+
+    async def run(self, function, *args):
+        """
+        Выполняет блокирующую функцию в пуле потоков.
+
+        Args:
+            function: Функция.
+            *args: Аргументы функции.
+
+        Returns:
+            Результат функции.
+        """
+        return await asyncio.get_running_loop().run_in_executor(self.pool, function, *args)
+
+    def batcher(self, model: BaseModel) -> MicroBatcher:
+        """
+        Возвращает очередь пакетной генерации для модели, создавая ее при первом обращении.
+
+        Args:
+            model (BaseModel): Модель.
+
+        Returns:
+            MicroBatcher: Очередь запросов модели.
+        """
+        if model not in self._batchers:
+            self._batchers[model] = MicroBatcher(model, self.run, self.max_batch_size, self.batch_window)
+        return self._batchers[model]
+
+    def forget(self, model: BaseModel) -> None:
+        """
+        Закрывает очередь пакетной генерации выгруженной модели.
+
+        Args:
+            model (BaseModel): Модель.
+        """
+        batcher = self._batchers.pop(model, None)
+        if batcher is not None:
+            batcher.close()
+
+    async def generate(self, model: BaseModel, prompt: str, timeout: float | None = None) -> str | None:
+        """
+        Генерирует ответ в пуле потоков, не блокируя цикл событий.
+
+        Если ответ не готов за отведенное время, запрос, еще не начавший выполняться,
+        снимается с очереди, а уже идущая генерация завершится в фоне.
+
+        Args:
+            model (BaseModel): Модель для генерации.
+            prompt (str): Текстовая подсказка.
+            timeout (float | None): Таймаут в секундах, по умолчанию - таймаут пула.
+
+        Returns:
+            str | None: Сгенерированный ответ или None при таймауте или ошибке.
+        """
+        if self.max_batch_size > 1:
+            future = self.batcher(model).submit(prompt)
+        else:
+            future = asyncio.get_running_loop().run_in_executor(self.pool, model.generate_response, prompt)
+        self.active += 1
+        try:
+            return await asyncio.wait_for(future, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            print(f"Генерация не уложилась в {timeout or self.timeout} с, используется статический текст")
+        except Exception as e:
+            print(f"Ошибка генерации ответа: {e}")
+        finally:
+            self.active -= 1
+        return None
+
+    def shutdown(self) -> None:
+        """Отменяет ожидающие генерации и останавливает пул."""
+        for batcher in self._batchers.values():
+            batcher.close()
+        self._batchers.clear()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Общий пул генерации бота
+executor = GenerationExecutor()
+
+
+def configure_executor(max_workers: int = 1, timeout: float = 30.0,
+                       max_batch_size: int = 1, batch_window: float = 0.05) -> None:
+    """
+    Задает параметры общего пула генерации до первого запроса.
+
+    Args:
+        max_workers (int): Максимальное количество одновременных генераций.
+        timeout (float): Таймаут ожидания одного ответа в секундах.
+        max_batch_size (int): Максимальный размер пакета; 1 - без объединения запросов.
+        batch_window (float): Время сбора пакета в секундах.
+    """
+    executor.shutdown()
+    executor.max_workers = max_workers
+    executor.timeout = timeout
+    executor.max_batch_size = max_batch_size
+    executor.batch_window = batch_window
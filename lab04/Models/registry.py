@@ -0,0 +1,268 @@
+"""
+Модуль с общим реестром загруженных моделей бота.
+
+Каждая модель загружается один раз и используется всеми чатами. Загрузка идет
+в отдельном потоке, не блокируя цикл событий; при превышении лимита количества
+моделей или бюджета памяти выгружаются модели, которые дольше всего не использовались.
+Место под новую модель освобождается до начала ее загрузки по оценке ее размера,
+чтобы старые и новая модели не оказались в памяти одновременно.
+Неудачная загрузка не повторяется автоматически в течение retry_delay секунд.
+"""
+import asyncio
+import gc
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+import torch
+from textgen_common.snapshot import WEIGHTS_NAME, snapshot_path
+from transformers import AutoConfig, AutoModelForCausalLM
+
+from Models.BaseModel import BaseModel
+from Models.executor import executor
+from Models.response_pool import response_pool
+from Models.snapshot import SNAPSHOT_ROOT
+
+
+class ModelRegistry:
+    """
+    Реестр моделей по имени с вытеснением давно не использованных.
+    """
+
+    def __init__(self, max_models: int = 2, memory_budget_mb: int = 0, default_model: str | None = None,
+                 retry_delay: float = 60.0) -> None:
+        """
+        Создает пустой реестр.
+
+        Args:
+            max_models (int): Максимальное количество одновременно загруженных моделей.
+            memory_budget_mb (int): Бюджет памяти на веса всех моделей в МБ; 0 - без ограничения.
+            default_model (str | None): Модель для чатов, в которых модель не выбрана.
+            retry_delay (float): Время в секундах, в течение которого неудачная загрузка не повторяется.
+        """
+        self.max_models = max_models
+        self.memory_budget_mb = memory_budget_mb
+        self.default_model = default_model
+        self.retry_delay = retry_delay
+        self._models: OrderedDict[str, BaseModel] = OrderedDict()
+        self._loading: dict[str, asyncio.Future] = {}
+        # Имя загружаемой модели -> оценка ее размера в МБ
+        self._reserved: dict[str, float] = {}
+        # Имя модели -> время последней неудачной загрузки
+        self._failed: dict[str, float] = {}
+        self.on_load: list[Callable[[BaseModel], None]] = []
+        self.on_evict: list[Callable[[BaseModel], None]] = []
+
+    def get(self, model_name: str) -> BaseModel | None:
+        """
+        Возвращает загруженную модель и отмечает ее использование.
+
+        Args:
+            model_name (str): Имя модели.
+
+        Returns:
+            BaseModel | None: Модель или None, если она не загружена.
+        """
+        model = self._models.get(model_name)
+        if model is not None:
+            self._models.move_to_end(model_name)
+        return model
+
+    def is_loading(self, model_name: str) -> bool:
+        """
+        Проверяет, идет ли загрузка модели.
+
+        Args:
+            model_name (str): Имя модели.
+
+        Returns:
+            bool: True, если модель загружается.
+        """
+        return model_name in self._loading
+
+    def recently_failed(self, model_name: str) -> bool:
+        """
+        Проверяет, завершилась ли загрузка модели ошибкой менее retry_delay секунд назад.
+
+        Args:
+            model_name (str): Имя модели.
+
+        Returns:
+            bool: True, если повторять загрузку пока не нужно.
+        """
+        failed_at = self._failed.get(model_name)
+        return failed_at is not None and time.monotonic() - failed_at < self.retry_delay
+
+    def load(self, model_name: str) -> asyncio.Future:
+        """
+        Запускает фоновую загрузку модели; повторные вызовы возвращают ту же задачу.
+        Ошибка загрузки выводится в лог, даже если результат задачи никто не ожидает.
+
+        Args:
+            model_name (str): Имя модели.
+
+        Returns:
+            asyncio.Future: Задача, результатом которой будет загруженная модель.
+        """
+        task = self._loading.get(model_name)
+        if task is None:
+            if model_name in self._models:
+                task = asyncio.get_running_loop().create_future()
+                task.set_result(self.get(model_name))
+                return task
+            task = self._loading[model_name] = asyncio.create_task(self._load(model_name))
+            task.add_done_callback(lambda done: self._report(model_name, done))
+        return task
+
+    def _report(self, model_name: str, task: asyncio.Future) -> None:
+        """
+        Запоминает и выводит ошибку завершившейся загрузки.
+
+        Args:
+            model_name (str): Имя модели.
+            task (asyncio.Future): Завершившаяся задача загрузки.
+        """
+        if task.cancelled() or task.exception() is None:
+            return
+        self._failed[model_name] = time.monotonic()
+        print(f"Ошибка загрузки модели {model_name}: {task.exception()}")
+
+    async def _load(self, model_name: str) -> BaseModel:
+        """
+        Загружает модель в отдельном потоке и добавляет ее в реестр.
+
+        Args:
+            model_name (str): Имя модели.
+
+        Returns:
+            BaseModel: Загруженная модель.
+        """
+        try:
+            self._reserved[model_name] = await asyncio.to_thread(self.estimate_mb, model_name)
+            self._shrink()
+            model = await asyncio.to_thread(BaseModel, model_name)
+        finally:
+            self._loading.pop(model_name, None)
+            self._reserved.pop(model_name, None)
+
+        self._failed.pop(model_name, None)
+        self._models[model_name] = model
+        for callback in self.on_load:
+            callback(model)
+        self._shrink(keep=model_name)
+        return model
+
+    @staticmethod
+    def memory_mb(model: BaseModel) -> float:
+        """
+        Оценивает память, занятую весами модели.
+
+        Args:
+            model (BaseModel): Модель.
+
+        Returns:
+            float: Размер весов в МБ.
+        """
+        return model.model.get_memory_footprint() / 1024 / 1024
+
+    @staticmethod
+    def estimate_mb(model_name: str) -> float:
+        """
+        Оценивает память под веса модели до ее загрузки.
+
+        Для снимка берется размер файла весов, иначе модель строится по конфигурации
+        на устройстве meta (без выделения памяти) и считаются ее параметры в float32,
+        как их загружает from_pretrained.
+
+        Args:
+            model_name (str): Имя модели.
+
+        Returns:
+            float: Оценка размера весов в МБ; 0, если оценить не удалось.
+        """
+        weights = os.path.join(snapshot_path(model_name, SNAPSHOT_ROOT), WEIGHTS_NAME)
+        if os.path.exists(weights):
+            return os.path.getsize(weights) / 1024 / 1024
+        try:
+            config = AutoConfig.from_pretrained(model_name)
+            with torch.device("meta"):
+                model = AutoModelForCausalLM.from_config(config)
+        except Exception as e:
+            print(f"Не удалось оценить размер модели {model_name}: {e}")
+            return 0.0
+        return sum(parameter.numel() for parameter in model.parameters()) * 4 / 1024 / 1024
+
+    def _shrink(self, keep: str | None = None) -> None:
+        """
+        Выгружает давно не использованные модели, пока реестр вместе с загружаемыми
+        моделями не уложится в лимиты.
+
+        Args:
+            keep (str | None): Имя модели, которую выгружать нельзя.
+        """
+        def over_limit() -> bool:
+            if len(self._models) + len(self._reserved) > self.max_models:
+                return True
+            return self.memory_budget_mb > 0 and \
+                sum(self.memory_mb(model) for model in self._models.values()) + \
+                sum(self._reserved.values()) > self.memory_budget_mb
+
+        for model_name in list(self._models):
+            if not over_limit():
+                break
+            if model_name != keep:
+                self.evict(model_name)
+
+    def evict(self, model_name: str) -> bool:
+        """
+        Выгружает модель из реестра.
+
+        Запросы, ожидающие пакетной генерации этой моделью, сразу получают ошибку и используют
+        статический текст; уже начатая генерация завершится в фоне, и память освободится после нее.
+
+        Args:
+            model_name (str): Имя модели.
+
+        Returns:
+            bool: True, если модель была загружена и выгружена.
+        """
+        model = self._models.pop(model_name, None)
+        if model is None:
+            return False
+        for callback in self.on_evict:
+            callback(model)
+        gc.collect()
+        return True
+
+    def loaded(self) -> list[str]:
+        """
+        Возвращает имена загруженных моделей от самой старой к самой свежей.
+
+        Returns:
+            list[str]: Имена моделей.
+        """
+        return list(self._models)
+
+
+# Общий реестр моделей бота
+registry = ModelRegistry()
+registry.on_evict.append(lambda model: response_pool.unregister(model.model_name))
+registry.on_evict.append(executor.forget)
+
+
+def configure_registry(max_models: int = 2, memory_budget_mb: int = 0, default_model: str | None = None,
+                       retry_delay: float = 60.0) -> None:
+    """
+    Задает параметры общего реестра моделей.
+
+    Args:
+        max_models (int): Максимальное количество одновременно загруженных моделей.
+        memory_budget_mb (int): Бюджет памяти на веса всех моделей в МБ; 0 - без ограничения.
+        default_model (str | None): Модель для чатов, в которых модель не выбрана.
+        retry_delay (float): Время в секундах, в течение которого неудачная загрузка не повторяется.
+    """
+    registry.max_models = max_models
+    registry.memory_budget_mb = memory_budget_mb
+    registry.default_model = default_model or None
+    registry.retry_delay = retry_delay
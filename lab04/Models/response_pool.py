@@ -0,0 +1,151 @@
+"""
+Модуль с пулом заранее сгенерированных ответов на фиксированные промты опроса.
+
+Промты шагов опроса не зависят от пользователя, поэтому ответы на них можно
+сгенерировать заранее: пул держит до size вариантов на каждую пару (модель, промт),
+отдает их обработчикам мгновенно и пополняется в фоне, когда генерация не занята
+живыми запросами. Пополнение генерирует по одному варианту за раз: пришедший во время
+него запрос пользователя ждет не дольше одной генерации, а не целого пакета.
+Если варианты закончились, обработчик генерирует ответ сам.
+"""
+import asyncio
+from collections import deque
+
+from Models.BaseModel import BaseModel
+from Models.executor import GenerationExecutor, executor as default_executor
+
+
+class ResponsePool:
+    """
+    Фоновый пул вариантов ответов по ключу (имя модели, промт).
+    """
+
+    def __init__(self, executor: GenerationExecutor, size: int = 5, idle_delay: float = 1.0) -> None:
+        """
+        Создает пустой пул; фоновое пополнение запускается при регистрации первой модели.
+
+        Args:
+            executor (GenerationExecutor): Пул генерации, в котором выполняется пополнение.
+            size (int): Количество вариантов на каждую пару (модель, промт); 0 - пул выключен.
+            idle_delay (float): Пауза в секундах перед повторной проверкой, если генерация занята.
+        """
+        self.executor = executor
+        self.size = size
+        self.idle_delay = idle_delay
+        self._models: dict[str, BaseModel] = {}
+        self._prompts: dict[str, list[str]] = {}
+        self._responses: dict[tuple[str, str], deque[str]] = {}
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def register(self, model: BaseModel, prompts: list[str]) -> None:
+        """
+        Добавляет модель и ее промты в пул и запускает пополнение.
+
+        Args:
+            model (BaseModel): Модель.
+            prompts (list[str]): Промты, для которых нужны готовые ответы.
+        """
+        if self.size <= 0:
+            return
+        self._models[model.model_name] = model
+        self._prompts[model.model_name] = list(dict.fromkeys(prompts))
+        for prompt in self._prompts[model.model_name]:
+            self._responses.setdefault((model.model_name, prompt), deque())
+
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._fill())
+        self._wakeup.set()
+
+    def unregister(self, model_name: str) -> None:
+        """
+        Удаляет модель и ее варианты из пула.
+
+        Args:
+            model_name (str): Имя модели.
+        """
+        self._models.pop(model_name, None)
+        for prompt in self._prompts.pop(model_name, []):
+            self._responses.pop((model_name, prompt), None)
+
+    def take(self, model: BaseModel, prompt: str) -> str | None:
+        """
+        Забирает готовый вариант ответа.
+
+        Args:
+            model (BaseModel): Модель.
+            prompt (str): Промт.
+
+        Returns:
+            str | None: Вариант ответа или None, если пул пуст.
+        """
+        responses = self._responses.get((model.model_name, prompt))
+        if not responses:
+            return None
+        response = responses.popleft()
+        self._wakeup.set()
+        return response
+
+    def _missing(self) -> tuple[BaseModel, str] | None:
+        """
+        Находит пару (модель, промт), которой больше всего не хватает вариантов.
+
+        Returns:
+            tuple[BaseModel, str] | None: Модель и промт или None, если пул заполнен.
+        """
+        best, best_missing = None, 0
+        for (model_name, prompt), responses in self._responses.items():
+            missing = self.size - len(responses)
+            if missing > best_missing:
+                best, best_missing = (self._models[model_name], prompt), missing
+        return best
+
+    async def _fill(self) -> None:
+        """
+        Пополняет пул, пока генерация не занята живыми запросами.
+        """
+        while True:
+            missing = self._missing()
+            if missing is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if self.executor.active:
+                await asyncio.sleep(self.idle_delay)
+                continue
+
+            model, prompt = missing
+            try:
+                response = await self.executor.run(model.generate_response, prompt)
+            except Exception as e:
+                print(f"Ошибка пополнения пула ответов: {e}")
+                await asyncio.sleep(self.idle_delay)
+                continue
+
+            pool = self._responses.get((model.model_name, prompt))
+            if pool is not None and self._models.get(model.model_name) is model and response:
+                pool.append(response)
+
+    def close(self) -> None:
+        """Останавливает фоновое пополнение."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+# Общий пул ответов бота
+response_pool = ResponsePool(default_executor)
+
+
+def configure_response_pool(size: int = 5, idle_delay: float = 1.0) -> None:
+    """
+    Задает параметры общего пула ответов до регистрации моделей.
+
+    Args:
+        size (int): Количество вариантов на каждую пару (модель, промт); 0 - пул выключен.
+        idle_delay (float): Пауза в секундах перед повторной проверкой, если генерация занята.
+    """
+    response_pool.size = size
+    response_pool.idle_delay = idle_delay
@@ -0,0 +1,50 @@
+"""
+Модуль для быстрого запуска моделей бота из локальных снимков весов.
+
+Снимки создаются и загружаются средствами textgen_common.snapshot; здесь задан
+каталог снимков бота и загрузка по имени модели без запасного from_pretrained
+(его выполняет BaseModel).
+
+Создание снимков:
+    python -m Models.snapshot ai-forever/rugpt3medium_based_on_gpt2 Vikhrmodels/Vikhr-Llama-3.2-1B-Instruct
+"""
+import argparse
+import os
+
+from textgen_common.snapshot import create_snapshot, find_snapshot, snapshot_path
+from transformers import PreTrainedModel, PreTrainedTokenizerBase
+
+SNAPSHOT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "snapshots")
+
+
+def load_pretrained(model_name: str,
+                    snapshot_root: str = SNAPSHOT_ROOT) -> tuple[PreTrainedModel, PreTrainedTokenizerBase] | None:
+    """
+    Загружает модель и токенизатор из локального снимка.
+
+    Args:
+        model_name (str): Имя модели в Hugging Face Hub.
+        snapshot_root (str): Корневой каталог снимков.
+
+    Returns:
+        tuple[PreTrainedModel, PreTrainedTokenizerBase] | None: Модель и токенизатор или None, если снимка нет.
+    """
+    return find_snapshot(model_name, snapshot_root)
+
+
+def main():
+    """
+    Точка входа: создает снимки перечисленных моделей.
+    """
+    parser = argparse.ArgumentParser(description="Создание локальных снимков моделей в safetensors")
+    parser.add_argument("models", nargs="+", help="имена моделей в Hugging Face Hub")
+    parser.add_argument("--snapshot-root", default=SNAPSHOT_ROOT)
+    args = parser.parse_args()
+
+    for model_name in args.models:
+        output_dir = create_snapshot(model_name, model_name, snapshot_path(model_name, args.snapshot_root))
+        print(f"Снимок {model_name} сохранен в {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
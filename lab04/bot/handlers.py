@@ -1,4 +1,6 @@
 """Модуль для обработки шагов опроса и управления выбором модели в Telegram-боте."""
+import asyncio
+
 from aiogram import types
 from aiogram.fsm.context import FSMContext
 from aiogram.types import ReplyKeyboardRemove
@@ -6,18 +8,77 @@ from aiogram.filters import Command, StateFilter
 from aiogram import Router
 
 from Models.BaseModel import BaseModel
+from Models.executor import executor
+from Models.registry import registry
+from Models.response_pool import response_pool
 from bot.States import SurveyStates, ModelSelectionStates
+from bot.survey_sink import survey_sink
 from bot.utils import load_survey_data, create_buttons
 
+MODELS = ["ai-forever/rugpt3medium_based_on_gpt2", "Vikhrmodels/Vikhr-Llama-3.2-1B-Instruct"]
+
 router = Router()
-model: BaseModel = None
 survey_data = load_survey_data()
+survey_prompts = [step["prompt"] for step in survey_data.values() if "prompt" in step]
+registry.on_load.append(lambda loaded: response_pool.register(loaded, survey_prompts))
+# Ссылки на фоновые задачи, чтобы их не удалил сборщик мусора
+background_tasks: set[asyncio.Task] = set()
+
+
+async def chat_model(state: FSMContext) -> BaseModel | None:
+    """
+        Возвращает модель, выбранную в чате, или модель по умолчанию.
+        Если модель еще не загружена (или была выгружена), запускает ее загрузку в фоне,
+        если только предыдущая попытка не завершилась ошибкой совсем недавно.
+        Args:
+            state (FSMContext): Контекст состояния FSM.
+
+        Returns:
+            BaseModel | None: Загруженная модель или None, если модель не выбрана или загружается.
+        """
+    model_name = (await state.get_data()).get("model_name") or registry.default_model
+    if not model_name:
+        return None
+    model = registry.get(model_name)
+    if model is None and not registry.recently_failed(model_name):
+        registry.load(model_name)
+    return model
+
+
+async def finish_survey(state: FSMContext):
+    """
+        Сбрасывает состояние и ответы опроса, сохраняя выбранную в чате модель.
+        Args:
+            state (FSMContext): Контекст состояния FSM.
+        """
+    model_name = (await state.get_data()).get("model_name")
+    await state.set_state(None)
+    await state.set_data({"model_name": model_name} if model_name else {})
+
+
+async def notify_loaded(message: types.Message, model_name: str):
+    """
+        Дожидается загрузки модели и сообщает о ней пользователю.
+        Args:
+            message (types.Message): Сообщение с выбором модели.
+            model_name (str): Имя модели.
+        """
+    try:
+        await registry.load(model_name)
+    except Exception:
+        # Ошибку уже вывел реестр
+        await message.answer(f"Не удалось загрузить модель - {model_name}")
+        return
+    await message.answer(f"Модель {model_name} загружена")
 
 
 async def handle_survey_step(message: types.Message, state: FSMContext, step: str):
     """
         Обрабатывает текущий шаг опроса, выводя текст и кнопки для пользователя.
         Также генерирует ответ с помощью модели, если это указано в данных шага.
+        Сначала используется заранее сгенерированный вариант из пула ответов, иначе генерация
+        выполняется в отдельном пуле потоков; если она не уложилась в таймаут, отправляется
+        статический текст шага.
 
         Args:
             message (types.Message): Сообщение от пользователя.
@@ -27,9 +88,10 @@ async def handle_survey_step(message: types.Message, state: FSMContext, step: st
     text = survey_data[step].get("text", "Ошибка: нет текста для этого шага")
     buttons = survey_data[step].get("buttons", [])
     prompt = survey_data[step].get("prompt", None)
+    model = await chat_model(state) if prompt else None
 
     if prompt and model:
-        text = model.generate_response(prompt)
+        text = response_pool.take(model, prompt) or await executor.generate(model, prompt) or text
 
     await message.answer(
         text,
@@ -45,8 +107,7 @@ async def choose_model(message: types.Message, state: FSMContext):
             message (types.Message): Сообщение от пользователя.
             state (FSMContext): Контекст состояния FSM.
         """
-    model_buttons = ["ai-forever/rugpt3medium_based_on_gpt2", "Vikhrmodels/Vikhr-Llama-3.2-1B-Instruct"]
-    markup = create_buttons(model_buttons)
+    markup = create_buttons(MODELS)
     text = "Выберите модель"
 
     await message.answer(text, reply_markup=markup)
@@ -56,20 +117,31 @@ async def choose_model(message: types.Message, state: FSMContext):
 @router.message(ModelSelectionStates.model_selection)
 async def model_selection(message: types.Message, state: FSMContext):
     """
-        Обрабатывает выбор модели и устанавливает её для использования.
+        Обрабатывает выбор модели и устанавливает её для использования в этом чате.
+        Модель загружается в фоне один раз для всех чатов; остальные пользователи при этом не ждут.
         Args:
             message (types.Message): Сообщение от пользователя.
             state (FSMContext): Контекст состояния FSM.
         """
-    global model
-    model = BaseModel(message.text.lower())
+    model_name = message.text
+    if model_name not in MODELS:
+        await message.answer("Выберите модель из списка", reply_markup=create_buttons(MODELS))
+        return
+
+    await state.set_state(None)
+    await state.update_data(model_name=model_name)
+
+    if registry.get(model_name) is not None:
+        await message.answer(f"Вы выбрали модель - {model_name}", reply_markup=ReplyKeyboardRemove())
+        return
 
     await message.answer(
-        f"Вы выбрали модель - {message.text.lower()}",
+        f"Вы выбрали модель - {model_name}. Модель загружается…",
         reply_markup=ReplyKeyboardRemove()
     )
-
-    await state.clear()
+    task = asyncio.create_task(notify_loaded(message, model_name))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
 
 
 @router.message(Command('start'), StateFilter(None))
@@ -149,12 +221,13 @@ async def process_overall_satisfaction(message: types.Message, state: FSMContext
 @router.message(SurveyStates.additional_comments)
 async def process_additional_comments(message: types.Message, state: FSMContext):
     """
-        Обрабатывает дополнительные комментарии пользователя и завершает опрос.
+        Обрабатывает дополнительные комментарии пользователя, сохраняет ответы и завершает опрос.
         Args:
             message (types.Message): Сообщение от пользователя.
             state (FSMContext): Контекст состояния FSM."""
     await state.update_data(additional_comments=message.text.lower())
     user_data = await state.get_data()
+    survey_sink.write({"chat_id": message.chat.id, "user_id": message.from_user.id, **user_data})
 
     await message.answer(
         "Вот ваши ответы:\n\n"
@@ -165,4 +238,4 @@ async def process_additional_comments(message: types.Message, state: FSMContext)
         f"Общая удовлетворенность: {user_data['overall_satisfaction']}\n"
         f"Комментарии: {user_data['additional_comments']}")
     await handle_survey_step(message, state, "thank_you")
-    await state.clear()
+    await finish_survey(state)
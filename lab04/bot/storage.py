@@ -0,0 +1,145 @@
+"""
+Модуль с хранилищами состояний FSM для бота.
+
+SQLiteStorage сохраняет состояние и данные каждого чата в локальную базу SQLite,
+поэтому незавершенные опросы и выбранная модель переживают перезапуск бота.
+База работает в режиме WAL с synchronous=NORMAL: каждая запись - одна короткая
+транзакция без fsync, а диск синхронизируется только при контрольных точках.
+Записи недавно активных чатов кэшируются в памяти с вытеснением давно не использованных.
+"""
+import json
+import sqlite3
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    Хранилище FSM в SQLite с кэшем записей в памяти.
+    """
+
+    def __init__(self, path: str = "fsm.sqlite3", key_builder: KeyBuilder | None = None,
+                 cache_size: int = 10000) -> None:
+        """
+        Открывает или создает базу состояний.
+
+        Args:
+            path (str): Путь к файлу базы SQLite.
+            key_builder (KeyBuilder | None): Построитель ключей записей; по умолчанию учитывает бота и destiny.
+            cache_size (int): Максимальное количество записей в кэше.
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS fsm (key TEXT PRIMARY KEY, state TEXT, data TEXT NOT NULL)"
+        )
+        self._connection.commit()
+        # Ключ -> (состояние, данные) в порядке последнего обращения; чтения
+        # закэшированных записей не идут в базу
+        self._cache: OrderedDict[str, tuple[str | None, dict[str, Any]]] = OrderedDict()
+
+    def _read(self, key: StorageKey) -> tuple[str, str | None, dict[str, Any]]:
+        """
+        Возвращает запись чата из кэша или из базы.
+
+        Args:
+            key (StorageKey): Ключ FSM.
+
+        Returns:
+            tuple[str, str | None, dict[str, Any]]: Строковый ключ, состояние и данные.
+        """
+        record_key = self.key_builder.build(key)
+        if record_key in self._cache:
+            self._cache.move_to_end(record_key)
+            state, data = self._cache[record_key]
+            return record_key, state, data
+        row = self._connection.execute("SELECT state, data FROM fsm WHERE key = ?", (record_key,)).fetchone()
+        if row is None:
+            # Отсутствующие записи не кэшируются, чтобы кэш не рос за счет чатов без состояния
+            return record_key, None, {}
+        state, data = row[0], json.loads(row[1])
+        self._remember(record_key, state, data)
+        return record_key, state, data
+
+    def _remember(self, record_key: str, state: str | None, data: dict[str, Any]) -> None:
+        """
+        Кладет запись в кэш, вытесняя давно не использованные.
+
+        Args:
+            record_key (str): Строковый ключ записи.
+            state (str | None): Состояние.
+            data (dict[str, Any]): Данные.
+        """
+        self._cache[record_key] = (state, data)
+        self._cache.move_to_end(record_key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _write(self, record_key: str, state: str | None, data: dict[str, Any]) -> None:
+        """
+        Сохраняет запись чата; пустые записи удаляются.
+
+        Args:
+            record_key (str): Строковый ключ записи.
+            state (str | None): Состояние.
+            data (dict[str, Any]): Данные.
+        """
+        with self._connection:
+            if state is None and not data:
+                self._cache.pop(record_key, None)
+                self._connection.execute("DELETE FROM fsm WHERE key = ?", (record_key,))
+            else:
+                self._remember(record_key, state, data)
+                self._connection.execute(
+                    "INSERT INTO fsm (key, state, data) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET state = excluded.state, data = excluded.data",
+                    (record_key, state, json.dumps(data, ensure_ascii=False)),
+                )
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record_key, _, data = self._read(key)
+        self._write(record_key, state.state if isinstance(state, State) else state, data)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return self._read(key)[1]
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(f"Data must be a dict or dict-like object, got {type(data).__name__}")
+        record_key, state, _ = self._read(key)
+        self._write(record_key, state, data.copy())
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return self._read(key)[2].copy()
+
+    async def close(self) -> None:
+        self._connection.close()
+
+
+def create_storage(backend: str = "sqlite", path: str = "fsm.sqlite3", cache_size: int = 10000) -> BaseStorage:
+    """
+    Создает хранилище FSM по имени.
+
+    Args:
+        backend (str): "sqlite" или "memory".
+        path (str): Путь к файлу базы для "sqlite".
+        cache_size (int): Максимальное количество записей в кэше для "sqlite".
+
+    Returns:
+        BaseStorage: Хранилище состояний.
+    """
+    if backend == "sqlite":
+        return SQLiteStorage(path, cache_size=cache_size)
+    if backend == "memory":
+        return MemoryStorage()
+    raise ValueError(f"Неизвестное хранилище состояний: {backend}")
@@ -0,0 +1,105 @@
+"""
+Модуль для сохранения завершенных опросов в JSONL файл.
+
+Ответы копятся в памяти и дописываются в файл пакетами из фонового потока:
+не чаще одного раза в flush_interval секунд или сразу по набору batch_size записей.
+Одна запись на диск и один fsync приходятся на весь пакет, а не на каждый ответ.
+"""
+import json
+import os
+import threading
+import time
+
+
+class SurveySink:
+    """
+    Пакетная дозапись результатов опросов в JSONL файл.
+    """
+
+    def __init__(self, filename: str = "surveys.jsonl", batch_size: int = 500, flush_interval: float = 1.0) -> None:
+        """
+        Создает приемник; файл и фоновый поток открываются при первой записи.
+
+        Args:
+            filename (str): Имя JSONL файла.
+            batch_size (int): Количество записей, после которого пакет пишется без ожидания интервала.
+            flush_interval (float): Максимальное время хранения записи в памяти в секундах.
+        """
+        self.filename = filename
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: list[str] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def write(self, record: dict) -> None:
+        """
+        Добавляет результат опроса в очередь на запись.
+
+        Args:
+            record (dict): Ответы пользователя и служебные поля.
+        """
+        line = json.dumps({"timestamp": time.time(), **record}, ensure_ascii=False)
+        with self._lock:
+            self._buffer.append(line)
+            if self._thread is None:
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name="survey-sink", daemon=True)
+                self._thread.start()
+            if len(self._buffer) >= self.batch_size:
+                self._wakeup.set()
+
+    def _run(self) -> None:
+        """
+        Фоновый поток: периодически сбрасывает накопленные записи в файл.
+        """
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Дописывает накопленные записи в файл одним вызовом write и синхронизирует его с диском.
+        """
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if not lines:
+            return
+        with open(self.filename, "a", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def close(self) -> None:
+        """
+        Останавливает фоновый поток и записывает оставшиеся результаты.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopped.set()
+            self._wakeup.set()
+            thread.join()
+        self.flush()
+
+
+# Общий приемник результатов опросов
+survey_sink = SurveySink()
+
+
+def configure_survey_sink(filename: str = "surveys.jsonl", batch_size: int = 500, flush_interval: float = 1.0) -> None:
+    """
+    Задает параметры общего приемника результатов до первой записи.
+
+    Args:
+        filename (str): Имя JSONL файла.
+        batch_size (int): Количество записей, после которого пакет пишется без ожидания интервала.
+        flush_interval (float): Максимальное время хранения записи в памяти в секундах.
+    """
+    survey_sink.close()
+    survey_sink.filename = filename
+    survey_sink.batch_size = batch_size
+    survey_sink.flush_interval = flush_interval
@@ -3,18 +3,43 @@ import asyncio
 import os
 
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import BotCommand
 
 from bot.handlers import router
+from bot.storage import create_storage
+from bot.survey_sink import configure_survey_sink, survey_sink
 from dotenv import load_dotenv
+from Models.executor import configure_executor, executor
+from Models.registry import configure_registry, registry
+from Models.response_pool import configure_response_pool, response_pool
+from textgen_common.metrics import configure_exporter
 
 
 async def main():
     """Основная асинхронная функция для запуска бота."""
     load_dotenv()
+    configure_exporter(os.getenv('METRICS_EXPORTER', 'none'),
+                       os.getenv('METRICS_CSV', 'generation_metrics.csv'),
+                       int(os.getenv('METRICS_PORT', '9100')))
+    configure_executor(int(os.getenv('GENERATION_WORKERS', '1')),
+                       float(os.getenv('GENERATION_TIMEOUT', '30')),
+                       int(os.getenv('GENERATION_BATCH_SIZE', '8')),
+                       float(os.getenv('GENERATION_BATCH_WINDOW', '0.05')))
+    configure_response_pool(int(os.getenv('RESPONSE_POOL_SIZE', '5')),
+                            float(os.getenv('RESPONSE_POOL_IDLE_DELAY', '1')))
+    configure_registry(int(os.getenv('MODEL_CACHE_SIZE', '2')),
+                       int(os.getenv('MODEL_MEMORY_BUDGET_MB', '0')),
+                       os.getenv('DEFAULT_MODEL'),
+                       float(os.getenv('MODEL_RETRY_DELAY', '60')))
+    if registry.default_model:
+        # Модель загружается до начала опроса, чтобы пул ответов заполнился заранее
+        await registry.load(registry.default_model)
     bot = Bot(token=os.getenv('API_TOKEN'))
-    storage = MemoryStorage()
+    storage = create_storage(os.getenv('FSM_STORAGE', 'sqlite'), os.getenv('FSM_STORAGE_PATH', 'fsm.sqlite3'),
+                             int(os.getenv('FSM_CACHE_SIZE', '10000')))
+    configure_survey_sink(os.getenv('SURVEY_RESULTS', 'surveys.jsonl'),
+                          int(os.getenv('SURVEY_RESULTS_BATCH', '500')),
+                          float(os.getenv('SURVEY_RESULTS_FLUSH_INTERVAL', '1')))
     dp = Dispatcher(storage=storage)
     dp.include_router(router)
     commands = [
@@ -22,7 +47,13 @@ async def main():
         BotCommand(command="/model", description="Выбор модели"),
     ]
     await bot.set_my_commands(commands=commands)
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        response_pool.close()
+        executor.shutdown()
+        survey_sink.close()
+        await storage.close()
 
 
 if __name__ == '__main__':